@@ -0,0 +1,157 @@
+"""Batch Runner - Sends enrichment/scoring prompts through the OpenAI Batch API."""
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+import requests
+from config import SCORING_BATCH_SIZE
+from utils.models import COMPANY_SCORE_BATCH_FORMAT
+from utils.http_session import get_http_session
+from utils import fast_json
+
+
+logger = logging.getLogger(__name__)
+
+
+OPENAI_API_BASE = "https://api.openai.com/v1"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchRunner:
+    """Runs LLM prompts as one OpenAI batch job (cheaper, not real-time)."""
+
+    def __init__(self, llm_client, poll_interval: int = 30, max_tokens: int = 2000):
+        """Initialize batch runner."""
+        if llm_client.provider != "openai":
+            raise ValueError("Batch mode requires the openai provider")
+        self.llm = llm_client
+        self.poll_interval = poll_interval
+        self.max_tokens = max_tokens
+
+    def run(self,
+            prompts: List[Tuple[str, str]],
+            model: Optional[str] = None,
+            response_format: Optional[Dict] = None) -> Dict[str, Dict]:
+        """Submit (custom_id, prompt) pairs and return parsed JSON keyed by custom_id."""
+        if not prompts:
+            return {}
+
+        logger.info(f"📦 Submitting batch of {len(prompts)} prompts...")
+        file_id = self._upload(self._build_jsonl(prompts, model or self.llm.model, response_format))
+        batch = self._post("/batches", {
+            "input_file_id": file_id,
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h"
+        })
+
+        while batch["status"] not in TERMINAL_STATUSES:
+            logger.info(f"  ⏳ Batch {batch['id']}: {batch['status']}")
+            time.sleep(self.poll_interval)
+            batch = self._get(f"/batches/{batch['id']}").json()
+
+        if batch["status"] != "completed" or not batch.get("output_file_id"):
+            raise Exception(f"OpenAI batch {batch['id']} ended with status: {batch['status']}")
+
+        output = self._get(f"/files/{batch['output_file_id']}/content").text
+        return self._parse_output(output)
+
+    def enrich_companies(self, enrichment_agent, search_results: list, additional_criteria: str = "") -> list:
+        """Batch equivalent of EnrichmentAgent.enrich_companies."""
+        logger.info(f"\n🔬 Enriching {len(search_results)} results (batch mode)...")
+
+        responses = self.run([
+            (f"enrich-{i}", enrichment_agent._build_prompt(result, additional_criteria))
+            for i, result in enumerate(search_results)
+        ], model=enrichment_agent.llm.model, response_format=enrichment_agent._extract_format(additional_criteria))
+
+        enriched = []
+        for i, result in enumerate(search_results):
+            raw = responses.get(f"enrich-{i}")
+            company_info = enrichment_agent._process_result(raw, result) if raw else None
+            if company_info:
+                enriched.append(company_info)
+
+        logger.info(f"\n✓ Enriched {len(enriched)} companies")
+        return enriched
+
+    def score_companies(self, scoring_agent, companies: list, category: str, batch_size: int = SCORING_BATCH_SIZE) -> list:
+        """Batch equivalent of ScoringAgent.score_companies."""
+        logger.info(f"\n🎯 Scoring {len(companies)} companies as {category}s (batch mode)...")
+
+        chunks = [companies[i:i + batch_size] for i in range(0, len(companies), batch_size)]
+        responses = self.run([
+            (f"score-{i}", scoring_agent._build_batch_prompt(chunk, category))
+            for i, chunk in enumerate(chunks)
+        ], model=scoring_agent.llm.model, response_format=COMPANY_SCORE_BATCH_FORMAT)
+
+        scored = []
+        for i, chunk in enumerate(chunks):
+            scored.extend(scoring_agent._merge_batch_result(chunk, category, responses.get(f"score-{i}", {})))
+
+        scored.sort(key=lambda x: x['fit_score'], reverse=True)
+        logger.info(f"\n✓ Scored and ranked {len(scored)} companies")
+        return scored
+
+    def _build_jsonl(self, prompts: List[Tuple[str, str]], model: str, response_format: Optional[Dict] = None) -> str:
+        """Serialize prompts as Batch API request lines."""
+        lines = []
+        for custom_id, prompt in prompts:
+            lines.append(fast_json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.1,
+                    "max_tokens": self.max_tokens,
+                    "response_format": response_format or {"type": "json_object"}
+                }
+            }))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _parse_output(output: str) -> Dict[str, Dict]:
+        """Demultiplex batch output lines back to custom_id -> JSON."""
+        responses = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = fast_json.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") != 200:
+                    logger.warning(f"  ⚠️  Batch request {record.get('custom_id')} failed: {record.get('error')}")
+                    continue
+                content = response["body"]["choices"][0]["message"]["content"]
+                responses[record["custom_id"]] = fast_json.loads(content)
+            except Exception as e:
+                logger.warning(f"  ⚠️  Could not parse batch output line: {e}")
+        return responses
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.llm.api_key}"}
+
+    def _upload(self, jsonl: str) -> str:
+        """Upload the request file and return its file id."""
+        response = get_http_session().post(
+            f"{OPENAI_API_BASE}/files",
+            headers=self._headers(),
+            data={"purpose": "batch"},
+            files={"file": ("batch_input.jsonl", jsonl.encode("utf-8"))},
+            timeout=60
+        )
+        if response.status_code != 200:
+            raise Exception(f"OpenAI file upload error: {response.status_code} - {response.text}")
+        return response.json()["id"]
+
+    def _post(self, path: str, payload: Dict) -> Dict:
+        response = get_http_session().post(f"{OPENAI_API_BASE}{path}", headers=self._headers(), json=payload, timeout=30)
+        if response.status_code != 200:
+            raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
+        return response.json()
+
+    def _get(self, path: str) -> requests.Response:
+        response = get_http_session().get(f"{OPENAI_API_BASE}{path}", headers=self._headers(), timeout=60)
+        if response.status_code != 200:
+            raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
+        return response
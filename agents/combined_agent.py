@@ -0,0 +1,120 @@
+"""Combined Agent - Extracts and scores a company in a single LLM call."""
+from typing import Dict, Optional
+import asyncio
+import logging
+from config import MAX_CONCURRENT_LLM_CALLS
+from prompts.prompts import render_prompt
+from utils.logging_setup import flush_logs
+from utils.models import COMPANY_EXTRACT_AND_SCORE_FORMAT
+from .enrichment_agent import EnrichmentAgent
+from .scoring_agent import ScoringAgent
+
+
+logger = logging.getLogger(__name__)
+
+
+class CombinedAgent:
+    """Agent that fuses enrichment and scoring into one LLM call per result.
+
+    Halves the LLM round-trips of the enrichment -> scoring pipeline. The
+    separate agents stay available (and remain the default) for comparison.
+    """
+
+    def __init__(self, llm_client, company_context: str):
+        """Initialize combined agent."""
+        self.llm = llm_client
+        self.company_context = company_context
+        # Reused for URL/location cleanup and score defaults
+        self.enrichment_agent = EnrichmentAgent(llm_client)
+
+    def extract_and_score(self,
+                          search_result: Dict[str, str],
+                          category: str,
+                          additional_criteria: str = "") -> Optional[Dict]:
+        """Extract company info from a search result and score it."""
+        return asyncio.run(self.extract_and_score_async(search_result, category, additional_criteria))
+
+    async def extract_and_score_async(self,
+                                      search_result: Dict[str, str],
+                                      category: str,
+                                      additional_criteria: str = "") -> Optional[Dict]:
+        """Async variant of extract_and_score."""
+        prompt = render_prompt(
+            "EXTRACT_AND_SCORE_COMPANY",
+            company_context=self.company_context,
+            title=search_result['title'],
+            url=search_result['url'],
+            content=search_result['content'],
+            additional_criteria=additional_criteria or "None",
+            category=category,
+            criteria=ScoringAgent._get_criteria(category)
+        )
+
+        try:
+            result = await self.llm.generate_json_with_trace_async(
+                prompt,
+                prompt_name="EXTRACT_AND_SCORE_COMPANY",
+                input_vars={
+                    "title": search_result['title'][:50],
+                    "url": search_result['url'],
+                    "category": category
+                },
+                use_cache=True,
+                response_format=COMPANY_EXTRACT_AND_SCORE_FORMAT
+            )
+
+            company_info = self.enrichment_agent._process_result(result, search_result)
+            if not company_info:
+                return None
+            return ScoringAgent._merge_result(company_info, category, result)
+        except Exception as e:
+            logger.warning(f"  ⚠️  Extract/score error: {e}")
+            return None
+
+    def extract_and_score_companies(self,
+                                    search_results: list,
+                                    category: str,
+                                    additional_criteria: str = "",
+                                    progress_callback=None) -> list:
+        """Extract and score all search results, ranked by fit score."""
+        return asyncio.run(
+            self.extract_and_score_companies_async(
+                search_results, category, additional_criteria, progress_callback
+            )
+        )
+
+    async def extract_and_score_companies_async(self,
+                                                search_results: list,
+                                                category: str,
+                                                additional_criteria: str = "",
+                                                progress_callback=None,
+                                                max_concurrency: int = MAX_CONCURRENT_LLM_CALLS) -> list:
+        """Extract and score all search results concurrently."""
+        total = len(search_results)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        completed = 0
+
+        logger.info(f"\n🔬🎯 Extracting and scoring {total} results as {category}s...")
+
+        async def process_one(result):
+            nonlocal completed
+            async with semaphore:
+                company = await self.extract_and_score_async(result, category, additional_criteria)
+
+            completed += 1
+            if progress_callback:
+                progress_callback(completed, total, result.get('title', 'Unknown'))
+
+            if company:
+                logger.info(f"  [{completed}/{total}] ✓ {company['company_name']}: {company['fit_score']}/100")
+            else:
+                logger.info(f"  [{completed}/{total}] ✗ Skipped (not a company)")
+            return company
+
+        results = await asyncio.gather(*(process_one(r) for r in search_results))
+        scored = [company for company in results if company]
+        scored.sort(key=lambda x: x['fit_score'], reverse=True)
+
+        logger.info(f"\n✓ Extracted and scored {len(scored)} companies")
+        flush_logs()
+        return scored
@@ -1,16 +1,49 @@
 """Enrichment Agent - Extracts company data from search results."""
 from typing import Dict, Optional, List
+import asyncio
+import logging
 import re
 from urllib.parse import urlparse
-from prompts.prompts import ENRICHMENT_EXTRACT_COMPANY_INFO
+from config import MAX_CONCURRENT_LLM_CALLS
+from prompts.prompts import render_prompt
+from utils.http_session import run_in_llm_executor
+from utils.logging_setup import flush_logs
+from utils.models import COMPANY_EXTRACT_BASE_FORMAT, COMPANY_EXTRACT_FORMAT, CRITERIA_CHECK_FORMAT
 
+try:
+    from ada_url import URL  # Fast WHATWG URL parser (optional)
+except ImportError:
+    URL = None
 
-def safe_print(msg):
-    """Print with error handling for broken pipes."""
-    try:
-        print(msg)
-    except:
-        pass
+
+# Precompiled patterns for website/location extraction. Website candidates are
+# found in one pass over URL starts; the label before each URL ranks it.
+_URL_START = re.compile(r'https?://', re.IGNORECASE | re.ASCII)
+_URL_SCHEME = re.compile(r'[a-z][a-z0-9+.-]*://', re.IGNORECASE)
+_HOST_END = re.compile(r'[/?#]')
+_URL_FULL = re.compile(r'https?://[^\s]+', re.IGNORECASE)
+_URL_DOMAIN = re.compile(r'https?://(?:www\.)?[a-zA-Z0-9-]+\.[a-zA-Z]{2,}', re.IGNORECASE | re.ASCII)
+_URL_LABELS = [
+    re.compile(r'(?:website|site|homepage):\s*$', re.IGNORECASE),   # "website: <url>"
+    re.compile(r'(?:visit|see)\s+(?:us\s+at\s+)?$', re.IGNORECASE),  # "visit us at <url>"
+]
+_URL_LABEL_WINDOW = 40  # Characters before a URL (and its leading whitespace) searched for a label
+_LOCATION_PATTERNS = [
+    re.compile(r'(?:based in|located in|headquarters in|hq in)\s+([A-Z][a-zA-Z\s]+(?:,\s*[A-Z]{2})?)'),
+    # "City, ST" with the 50 state codes grouped by first letter
+    re.compile(r'([A-Z][a-zA-Z\s]+?,\s*(?:A[KLRZ]|C[AOT]|DE|FL|GA|HI|I[ADLN]|K[SY]|LA|M[ADEINOST]|N[CDEHJMVY]|O[HKR]|PA|RI|S[CD]|T[NX]|UT|V[AT]|W[AIVY]))'),
+]
+_WWW_PREFIX = re.compile(r'^www\.')
+# Profile/aggregator sites that are never the company's own website
+_PROFILE_SITES = re.compile(
+    r'(?:linkedin|crunchbase|bloomberg|facebook|twitter|instagram)\.com',
+    re.IGNORECASE
+)
+_MIN_PROFILE_HOST_LEN = len('twitter.com')  # Shortest host the pattern can match
+_CRITERIA_EXCERPT_CHARS = 1000  # Page content shown to the criteria check
+
+
+logger = logging.getLogger(__name__)
 
 
 class EnrichmentAgent:
@@ -21,75 +54,173 @@ class EnrichmentAgent:
         self.llm = llm_client
     
     def extract_company_info(self, search_result: Dict[str, str], additional_criteria: str = "") -> Optional[Dict[str, str]]:
-        """Extract structured company info from search result."""
+        """Extract structured company info from search result.
+        
+        The extraction ignores the criteria (ENRICHMENT_EXTRACT_COMPANY_BASE),
+        so its cached response is shared by every criteria; criteria are then
+        checked on the extracted fields.
+        """
+        try:
+            result = self.llm.generate_json_with_trace(
+                self._build_prompt(search_result, ""),
+                prompt_name="ENRICHMENT_EXTRACT_COMPANY_BASE",
+                input_vars=self._trace_vars(search_result),
+                use_cache=True,
+                response_format=COMPANY_EXTRACT_BASE_FORMAT
+            )
+            company_info = self._process_result(result, search_result)
+        except Exception as e:
+            logger.warning(f"  ⚠️  Extraction error: {e}")
+            return None
         
+        if company_info and additional_criteria:
+            try:
+                check = self.llm.generate_json_with_trace(
+                    self._build_criteria_prompt(company_info, additional_criteria, search_result['content']),
+                    prompt_name="ENRICHMENT_CHECK_CRITERIA",
+                    input_vars={"company_name": company_info['company_name'], "additional_criteria": additional_criteria},
+                    use_cache=True,
+                    response_format=CRITERIA_CHECK_FORMAT
+                )
+                self._apply_criteria_check(company_info, check)
+            except Exception as e:
+                logger.warning(f"  ⚠️  Criteria check error: {e}")
+                self._apply_criteria_check(company_info, {})
+        return company_info
+    
+    async def extract_company_info_async(self, search_result: Dict[str, str], additional_criteria: str = "") -> Optional[Dict[str, str]]:
+        """Async variant of extract_company_info."""
+        return await run_in_llm_executor(self.extract_company_info, search_result, additional_criteria)
+    
+    @staticmethod
+    def _build_prompt(search_result: Dict[str, str], additional_criteria: str) -> str:
+        """Format the extraction prompt for a search result.
+        
+        Without criteria the trimmed ENRICHMENT_EXTRACT_COMPANY_BASE is used;
+        _process_result then fills in criteria_match.
+        """
         # Use centralized prompt template
-        prompt = ENRICHMENT_EXTRACT_COMPANY_INFO.format(
+        if not additional_criteria:
+            return render_prompt(
+                "ENRICHMENT_EXTRACT_COMPANY_BASE",
+                title=search_result['title'],
+                url=search_result['url'],
+                content=search_result['content']
+            )
+        return render_prompt(
+            "ENRICHMENT_EXTRACT_COMPANY_INFO",
             title=search_result['title'],
             url=search_result['url'],
             content=search_result['content'],
-            additional_criteria=additional_criteria or "None"
+            additional_criteria=additional_criteria
         )
-
-        try:
-            result = self.llm.generate_json_with_trace(
-                prompt,
-                prompt_name="ENRICHMENT_EXTRACT_COMPANY_INFO",
-                input_vars={
-                    "title": search_result['title'][:50],
-                    "url": search_result['url']
-                }
-            )
-            
-            # Skip if not a company
-            if not result.get('company_name'):
-                return None
-            
-            # Ensure criteria_match fields exist (backward compatibility)
-            if 'criteria_match' not in result:
-                result['criteria_match'] = True
-            if 'match_reason' not in result:
-                result['match_reason'] = "No criteria specified"
-            
-            # Clean up website URL - prioritize actual company website
-            result['website_url'] = self._get_company_website(
-                result.get('website_url'),
-                search_result['url'],
-                search_result['content']
-            )
-            
-            # Improve location extraction
-            result['locations'] = self._extract_locations(
-                result.get('locations', []),
-                search_result['content']
-            )
-            
-            return result
-        except Exception as e:
-            safe_print(f"  ⚠️  Extraction error: {e}")
+    
+    @staticmethod
+    def _extract_format(additional_criteria: str) -> Dict:
+        """Structured output format matching _build_prompt's template."""
+        return COMPANY_EXTRACT_FORMAT if additional_criteria else COMPANY_EXTRACT_BASE_FORMAT
+    
+    @staticmethod
+    def _build_criteria_prompt(company_info: Dict, additional_criteria: str, content: str) -> str:
+        """Format the criteria check prompt for an extracted company.
+        
+        A page excerpt goes along as evidence for criteria the extracted
+        fields don't capture (e.g. "uses Salesforce").
+        """
+        return render_prompt(
+            "ENRICHMENT_CHECK_CRITERIA",
+            company_name=company_info['company_name'],
+            website_url=company_info['website_url'],
+            locations=', '.join(company_info['locations']),
+            size_indicators=', '.join(company_info['size_indicators']),
+            business_description=company_info.get('business_description') or 'N/A',
+            content=content[:_CRITERIA_EXCERPT_CHARS],
+            additional_criteria=additional_criteria
+        )
+    
+    @staticmethod
+    def _apply_criteria_check(company_info: Dict, check: Dict):
+        """Replace the criteria fields of a criteria-free extraction."""
+        # A failed check keeps the company (validation is deliberately inclusive)
+        company_info['criteria_match'] = check.get('criteria_match', True)
+        company_info['match_reason'] = check.get('match_reason') or "Criteria could not be checked"
+    
+    @staticmethod
+    def _trace_vars(search_result: Dict[str, str]) -> Dict[str, str]:
+        """Input variables recorded by the prompt tracer."""
+        return {
+            "title": search_result['title'][:50],
+            "url": search_result['url']
+        }
+    
+    def _process_result(self, result: Dict, search_result: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """Clean up the raw LLM extraction."""
+        # Skip if not a company
+        if not result.get('company_name'):
             return None
+        
+        # Ensure criteria_match fields exist (backward compatibility)
+        if 'criteria_match' not in result:
+            result['criteria_match'] = True
+        if 'match_reason' not in result:
+            result['match_reason'] = "No criteria specified"
+        
+        # Clean up website URL - prioritize actual company website
+        result['website_url'] = self._get_company_website(
+            result.get('website_url'),
+            search_result['url'],
+            search_result['content']
+        )
+        
+        # Improve location extraction
+        result['locations'] = self._extract_locations(
+            self._as_list(result.get('locations')),
+            search_result['content']
+        )
+        result['size_indicators'] = self._as_list(result.get('size_indicators'))
+        
+        return result
     
     def enrich_companies(self, search_results: list, additional_criteria: str = "", progress_callback=None) -> list:
         """Enrich all search results."""
-        enriched = []
+        return asyncio.run(
+            self.enrich_companies_async(search_results, additional_criteria, progress_callback)
+        )
+    
+    async def enrich_companies_async(self,
+                                     search_results: list,
+                                     additional_criteria: str = "",
+                                     progress_callback=None,
+                                     max_concurrency: int = MAX_CONCURRENT_LLM_CALLS) -> list:
+        """Enrich all search results concurrently, keeping input order."""
+        total = len(search_results)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        completed = 0
         
-        safe_print(f"\n🔬 Enriching {len(search_results)} results...")
+        logger.info(f"\n🔬 Enriching {total} results...")
         
-        for i, result in enumerate(search_results, 1):
-            safe_print(f"  [{i}/{len(search_results)}] Processing...")
+        async def enrich_one(result):
+            nonlocal completed
+            async with semaphore:
+                company_info = await self.extract_company_info_async(result, additional_criteria)
+            
+            completed += 1
             
             # Update progress if callback provided
             if progress_callback:
-                progress_callback(i, len(search_results), result.get('title', 'Unknown'))
+                progress_callback(completed, total, result.get('title', 'Unknown'))
             
-            company_info = self.extract_company_info(result, additional_criteria)
             if company_info:
-                enriched.append(company_info)
-                safe_print(f"    ✓ {company_info['company_name']}")
+                logger.info(f"  [{completed}/{total}] ✓ {company_info['company_name']}")
             else:
-                safe_print(f"    ✗ Skipped (not a company)")
+                logger.info(f"  [{completed}/{total}] ✗ Skipped (not a company)")
+            return company_info
         
-        safe_print(f"\n✓ Enriched {len(enriched)} companies")
+        results = await asyncio.gather(*(enrich_one(r) for r in search_results))
+        enriched = [company_info for company_info in results if company_info]
+        
+        logger.info(f"\n✓ Enriched {len(enriched)} companies")
+        flush_logs()
         return enriched
     
     def _get_company_website(self, extracted_url: str, source_url: str, content: str) -> str:
@@ -116,28 +247,56 @@ class EnrichmentAgent:
         if not url:
             return False
         
-        url_lower = url.lower()
-        profile_sites = ['linkedin.com', 'crunchbase.com', 'bloomberg.com', 
-                        'facebook.com', 'twitter.com', 'instagram.com']
+        # Only the host can identify a profile site, and hosts shorter than the
+        # shortest profile domain cannot match at all. A "://" later in the URL
+        # (e.g. in a query string) is not a scheme.
+        scheme = _URL_SCHEME.match(url)
+        host = _HOST_END.split(url[scheme.end():] if scheme else url, 1)[0]
+        if len(host) < _MIN_PROFILE_HOST_LEN:
+            return True
         
-        return not any(site in url_lower for site in profile_sites)
+        return not _PROFILE_SITES.search(host)
     
     def _extract_website_from_content(self, content: str) -> Optional[str]:
-        """Extract company website from content text."""
-        # Look for common patterns
-        patterns = [
-            r'(?:website|site|homepage):\s*(https?://[^\s]+)',
-            r'(?:visit|see)\s+(?:us\s+at\s+)?(https?://[^\s]+)',
-            r'(https?://(?:www\.)?[a-zA-Z0-9-]+\.[a-zA-Z]{2,})',
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                if self._is_valid_company_url(match):
-                    return match
-        
-        return None
+        """Extract company website from content text.
+        
+        Prefers a labelled URL ("website: ...", then "visit us at ..."), else
+        the first bare domain.
+        """
+        labelled = [None] * len(_URL_LABELS)
+        # End of the last match per rank, so matches never overlap (as with findall)
+        label_ends = [0] * len(_URL_LABELS)
+        first_domain = None
+        domain_end = 0
+        
+        for start in _URL_START.finditer(content):
+            pos = start.start()
+            # The labels allow any whitespace before the URL, so the window
+            # starts at the last non-space character
+            label_pos = pos
+            while label_pos > 0 and content[label_pos - 1].isspace():
+                label_pos -= 1
+            for rank, label in enumerate(_URL_LABELS):
+                if labelled[rank] is not None or pos < label_ends[rank]:
+                    continue
+                if label.search(content, max(label_ends[rank], label_pos - _URL_LABEL_WINDOW), pos):
+                    url = _URL_FULL.match(content, pos)
+                    if not url:
+                        continue
+                    label_ends[rank] = url.end()
+                    if self._is_valid_company_url(url.group()):
+                        labelled[rank] = url.group()
+                        if rank == 0:
+                            return url.group()
+            
+            if first_domain is None and pos >= domain_end:
+                domain = _URL_DOMAIN.match(content, pos)
+                if domain:
+                    domain_end = domain.end()
+                    if self._is_valid_company_url(domain.group()):
+                        first_domain = domain.group()
+        
+        return labelled[1] or first_domain
     
     def _extract_locations(self, extracted_locations: List[str], content: str) -> List[str]:
         """Extract and improve location information."""
@@ -148,19 +307,23 @@ class EnrichmentAgent:
             locations.update([loc for loc in extracted_locations if loc])
         
         # Extract from content using patterns
-        location_patterns = [
-            r'(?:based in|located in|headquarters in|hq in)\s+([A-Z][a-zA-Z\s]+(?:,\s*[A-Z]{2})?)',
-            r'([A-Z][a-zA-Z\s]+,\s*(?:CA|TX|FL|NY|IL|OH|PA|MI|GA|NC|NJ|VA|WA|AZ|MA|TN|IN|MO|MD|WI|CO|MN|SC|AL|LA|KY|OR|OK|CT|UT|IA|NV|AR|MS|KS|NM|NE|WV|ID|HI|NH|ME|MT|RI|DE|SD|ND|AK|VT|WY))',
-        ]
-        
-        for pattern in location_patterns:
-            matches = re.findall(pattern, content)
+        for pattern in _LOCATION_PATTERNS:
+            matches = pattern.findall(content)
             locations.update([m.strip() for m in matches if m])
         
         # Return list, or indicate no location if empty
         result = list(locations)[:5]  # Limit to 5 locations
         return result if result else ["Location not specified"]
     
+    @staticmethod
+    def _as_list(value) -> List[str]:
+        """Coerce an LLM field that should be a list of strings."""
+        if not value:
+            return []
+        if isinstance(value, list):
+            return [str(v) for v in value if v]
+        return [str(value)]
+    
     @staticmethod
     def _clean_url(url: str) -> str:
         """Clean and normalize URL."""
@@ -172,11 +335,19 @@ class EnrichmentAgent:
     @staticmethod
     def _extract_domain(url: str) -> str:
         """Extract domain from URL."""
+        if URL is not None:
+            try:
+                host = URL(url if '://' in url else 'https://' + url).host
+                if host:
+                    return f"https://{host.removeprefix('www.')}"
+            except ValueError:
+                pass
+        
         try:
             parsed = urlparse(url)
             domain = parsed.netloc or parsed.path
             # Remove www.
-            domain = re.sub(r'^www\.', '', domain)
+            domain = _WWW_PREFIX.sub('', domain)
             # Remove path
             domain = domain.split('/')[0]
             return f"https://{domain}"
@@ -1,15 +1,32 @@
 """Research Agent - Discovers companies using web search."""
+import asyncio
+import logging
 import os
+import re
 from typing import List, Dict
+from urllib.parse import urlsplit
 from tavily import Client as TavilyClient
+from config import MAX_CONTENT_CHARS
+from utils.retry import retry_transient
 
 
-def safe_print(msg):
-    """Print with error handling."""
-    try:
-        print(msg)
-    except:
-        pass
+_WHITESPACE = re.compile(r'\s+')
+# Short page lines that are site chrome, not company text: cookie banners,
+# footers, skip links, and "Home | About | Contact" style navigation
+_BOILERPLATE_LINE = re.compile(
+    r'(?im)^[^\n]{0,200}?(?:'
+    r'\b(?:we|this (?:web)?site) uses? cookies|\baccept (?:all )?cookies|\bcookie (?:policy|settings|preferences)'
+    r'|all rights reserved|©|\bcopyright \d{4}|privacy policy|terms (?:of|and conditions)\b'
+    r'|skip to (?:main )?content'
+    r')[^\n]{0,200}$\n?'
+)
+_NAV_LINE = re.compile(r"(?m)^(?:[ \t]*[\w&'-]+(?: [\w&'-]+){0,2}[ \t]*[|•·])+[ \t]*[\w&'-]+(?: [\w&'-]+){0,2}[ \t]*$\n?")
+# Results that are never about a single company; dropped before any LLM call
+_NON_COMPANY_HOSTS = re.compile(r'(?:^|\.)(?:reddit\.com|quora\.com|youtube\.com|youtu\.be)$')
+_NON_COMPANY_TITLES = re.compile(r'\b(?:(?i:how to|best \d+)\b|vs\.?\s)')  # Comparisons: lowercase "vs" only
+
+
+logger = logging.getLogger(__name__)
 
 
 class ResearchAgent:
@@ -27,7 +44,7 @@ class ResearchAgent:
                         max_results: int = 5) -> List[Dict[str, str]]:
         """Search for companies using Tavily."""
         try:
-            response = self.client.search(
+            response = self._search(
                 query=query,
                 max_results=max_results,
                 search_depth="advanced",
@@ -42,43 +59,107 @@ class ResearchAgent:
                 
                 # Try to get raw_content if available (more detailed)
                 if 'raw_content' in result and result['raw_content']:
-                    content = result['raw_content'][:2000]  # Limit size
+                    content = result['raw_content']
                 
                 results.append({
                     'title': result.get('title', ''),
                     'url': result.get('url', ''),
-                    'content': content,
+                    'content': self._clean_content(content),
                     'score': result.get('score', 0)
                 })
             
             return results
         except Exception as e:
-            safe_print(f"Search error: {e}")
+            logger.warning(f"Search error: {e}")
             return []
     
+    @retry_transient
+    def _search(self, **kwargs) -> Dict:
+        """Tavily search with retries on rate limits and transient errors."""
+        return self.client.search(**kwargs)
+    
     def discover_companies(self, 
                           search_queries: List[str], 
                           max_per_query: int = 5,
                           progress_callback=None) -> List[Dict[str, str]]:
         """Run multiple searches and aggregate results."""
-        all_results = []
-        seen_urls = set()
+        return asyncio.run(
+            self.discover_companies_async(search_queries, max_per_query, progress_callback)
+        )
+    
+    async def discover_companies_async(self,
+                                       search_queries: List[str],
+                                       max_per_query: int = 5,
+                                       progress_callback=None) -> List[Dict[str, str]]:
+        """Run all searches concurrently and aggregate results in query order."""
+        total = len(search_queries)
+        completed = 0
         
-        for idx, query in enumerate(search_queries, 1):
-            safe_print(f"🔍 Searching: {query}")
+        async def search_one(query):
+            nonlocal completed
+            logger.info(f"🔍 Searching: {query}")
+            results = await asyncio.to_thread(self.search_companies, query, max_per_query)
             
+            completed += 1
             if progress_callback:
-                progress_callback(idx, len(search_queries), query)
-            
-            results = self.search_companies(query, max_results=max_per_query)
+                progress_callback(completed, total, query)
             
+            logger.info(f"  ✓ Found {len(results)} results")
+            return results
+        
+        all_results = []
+        seen_urls = set()
+        seen_contents = set()  # Same page text under another URL (mirrors, tracking links)
+        skipped = 0
+        
+        for results in await asyncio.gather(*(search_one(q) for q in search_queries)):
             for result in results:
-                url = result['url']
-                if url not in seen_urls:
-                    seen_urls.add(url)
-                    all_results.append(result)
-            
-            safe_print(f"  ✓ Found {len(results)} results")
+                url = self._canonical_url(result['url'])
+                if not self._may_be_company(url, result['title']):
+                    skipped += 1
+                    continue
+                content = result['content']
+                if url in seen_urls or (content and content in seen_contents):
+                    continue
+                seen_urls.add(url)
+                if content:
+                    seen_contents.add(content)
+                all_results.append(result)
         
-        safe_print(f"\n📊 Total unique results: {len(all_results)}")
+        if skipped:
+            logger.info(f"  ℹ️  Skipped {skipped} forum/video/how-to results")
+        logger.info(f"\n📊 Total unique results: {len(all_results)}")
         return all_results
+    
+    @staticmethod
+    def _clean_content(content: str, max_chars: int = MAX_CONTENT_CHARS) -> str:
+        """Strip boilerplate lines, collapse whitespace and truncate on a sentence boundary."""
+        # Raw pages can be huge; only normalize what could survive the cut
+        content = _NAV_LINE.sub('', _BOILERPLATE_LINE.sub('', content[:max_chars * 2]))
+        content = _WHITESPACE.sub(' ', content).strip()
+        if len(content) <= max_chars:
+            return content
+        
+        cut = content.rfind('. ', 0, max_chars)
+        if cut > max_chars // 2:
+            return content[:cut + 1]
+        return content[:max_chars]
+    
+    @staticmethod
+    def _may_be_company(canonical_url: str, title: str) -> bool:
+        """Cheap pre-filter for results that can't describe a single company."""
+        host = canonical_url.split('/', 1)[0]
+        return not (_NON_COMPANY_HOSTS.search(host) or _NON_COMPANY_TITLES.search(title))
+    
+    @staticmethod
+    def _canonical_url(url: str) -> str:
+        """Canonical form of a URL for duplicate detection.
+        
+        Ignores scheme, "www.", host case, query string, fragment and
+        trailing slash, so http://foo.com/ and https://www.foo.com match.
+        """
+        parts = urlsplit(url.strip() if '://' in url else 'https://' + url.strip())
+        host = parts.netloc.lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        return host + parts.path.rstrip('/')
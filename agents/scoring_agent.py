@@ -1,18 +1,20 @@
 """Scoring Agent - Ranks companies by fit score."""
-from typing import Dict
+from typing import Dict, List, Optional
+import asyncio
+import heapq
+import logging
+from config import MAX_CONCURRENT_LLM_CALLS, SCORING_BATCH_SIZE
 from prompts.prompts import (
-    SCORING_EVALUATE_COMPANY,
+    render_prompt,
     SCORING_CRITERIA_CUSTOMER,
     SCORING_CRITERIA_PARTNER
 )
+from utils.http_session import run_in_llm_executor
+from utils.logging_setup import flush_logs
+from utils.models import COMPANY_SCORE_FORMAT, COMPANY_SCORE_BATCH_FORMAT
 
 
-def safe_print(msg):
-    """Print with error handling."""
-    try:
-        print(msg)
-    except:
-        pass
+logger = logging.getLogger(__name__)
 
 
 class ScoringAgent:
@@ -27,77 +29,225 @@ class ScoringAgent:
                      company_info: Dict, 
                      category: str) -> Dict:
         """Score a single company."""
+        try:
+            result = self.llm.generate_json_with_trace(
+                self._build_prompt(company_info, category),
+                prompt_name="SCORING_EVALUATE_COMPANY",
+                input_vars=self._trace_vars(company_info, category),
+                use_cache=True,
+                response_format=COMPANY_SCORE_FORMAT
+            )
+            return self._merge_result(company_info, category, result)
+        except Exception as e:
+            logger.warning(f"  ⚠️  Scoring error: {e}")
+            return self._error_result(company_info, category)
+    
+    async def score_company_async(self, company_info: Dict, category: str) -> Dict:
+        """Async variant of score_company."""
+        return await run_in_llm_executor(self.score_company, company_info, category)
+    
+    def score_company_batch(self, companies: List[Dict], category: str) -> List[Dict]:
+        """Score several companies with a single LLM call.
         
-        criteria = self._get_criteria(category)
-        
-        # Safely handle locations and size_indicators
-        locations = company_info.get('locations', [])
-        if not isinstance(locations, list):
-            locations = [str(locations)] if locations else []
-        
-        size_indicators = company_info.get('size_indicators', [])
-        if not isinstance(size_indicators, list):
-            size_indicators = [str(size_indicators)] if size_indicators else []
+        Companies missing from the response (all of them if the call fails)
+        are re-scored one at a time.
+        """
+        merged = self._score_batch_once(companies, category)
+        for i in self._missing(merged):
+            logger.info(f"  ↻ Re-scoring {companies[i]['company_name']} on its own")
+            merged[i] = self.score_company(companies[i], category)
+        return merged
+    
+    async def score_company_batch_async(self, companies: List[Dict], category: str) -> List[Dict]:
+        """Async variant of score_company_batch; missing companies are re-scored concurrently."""
+        merged = await run_in_llm_executor(self._score_batch_once, companies, category)
+        missing = self._missing(merged)
+        for i in missing:
+            logger.info(f"  ↻ Re-scoring {companies[i]['company_name']} on its own")
+        singles = await asyncio.gather(*(self.score_company_async(companies[i], category) for i in missing))
+        for i, result in zip(missing, singles):
+            merged[i] = result
+        return merged
+    
+    def _score_batch_once(self, companies: List[Dict], category: str) -> List[Optional[Dict]]:
+        """Make the batch scoring call; companies missing from the response are None."""
+        try:
+            result = self.llm.generate_json_with_trace(
+                self._build_batch_prompt(companies, category),
+                prompt_name="SCORING_EVALUATE_COMPANIES_BATCH",
+                input_vars=self._batch_trace_vars(companies, category),
+                use_cache=True,
+                response_format=COMPANY_SCORE_BATCH_FORMAT
+            )
+            scores = self._batch_scores(result)
+        except Exception as e:
+            logger.warning(f"  ⚠️  Batch scoring error: {e}")
+            scores = {}
         
+        return self._merge_batch_scores(companies, category, scores)
+    
+    def _build_prompt(self, company_info: Dict, category: str) -> str:
+        """Format the scoring prompt for a company."""
         # Use centralized prompt template
-        prompt = SCORING_EVALUATE_COMPANY.format(
+        return render_prompt(
+            "SCORING_EVALUATE_COMPANY",
             company_context=self.company_context,
-            company_name=company_info['company_name'],
-            website_url=company_info['website_url'],
-            locations=', '.join(locations),
-            size_indicators=', '.join(size_indicators),
-            business_description=company_info.get('business_description', 'N/A'),
             category=category,
-            criteria=criteria
+            criteria=self._get_criteria(category),
+            **self._company_fields(company_info)
         )
-
-        try:
-            result = self.llm.generate_json_with_trace(
-                prompt,
-                prompt_name="SCORING_EVALUATE_COMPANY",
-                input_vars={
-                    "company_name": company_info['company_name'],
-                    "category": category
-                }
-            )
-            
-            # Merge with original company info
-            return {
-                **company_info,
-                'fit_score': result.get('fit_score', 0),
-                'estimated_size': result.get('estimated_size', 'Medium'),
-                'rationale': result.get('rationale', ''),
-                'category': category
-            }
-        except Exception as e:
-            safe_print(f"  ⚠️  Scoring error: {e}")
-            return {
-                **company_info,
-                'fit_score': 0,
-                'estimated_size': 'Medium',
-                'rationale': 'Error during scoring',
-                'category': category
-            }
-    
-    def score_companies(self, companies: list, category: str, progress_callback=None) -> list:
-        """Score all companies."""
-        safe_print(f"\n🎯 Scoring {len(companies)} companies as {category}s...")
+    
+    def _build_batch_prompt(self, companies: List[Dict], category: str) -> str:
+        """Format one scoring prompt listing several companies."""
+        entries = [
+            render_prompt("SCORING_COMPANY_ENTRY", index=i, **self._company_fields(company))
+            for i, company in enumerate(companies, 1)
+        ]
+        return render_prompt(
+            "SCORING_EVALUATE_COMPANIES_BATCH",
+            company_context=self.company_context,
+            companies="\n\n".join(entries),
+            category=category,
+            criteria=self._get_criteria(category)
+        )
+    
+    @staticmethod
+    def _company_fields(company_info: Dict) -> Dict[str, str]:
+        """Company fields as they appear in scoring prompts.
         
-        scored = []
-        for i, company in enumerate(companies, 1):
-            safe_print(f"  [{i}/{len(companies)}] {company['company_name']}")
-            
-            if progress_callback:
-                progress_callback(i, len(companies), company['company_name'])
+        List fields are already normalized by EnrichmentAgent._process_result.
+        """
+        return {
+            'company_name': company_info['company_name'],
+            'website_url': company_info['website_url'],
+            'locations': ', '.join(company_info.get('locations', [])),
+            'size_indicators': ', '.join(company_info.get('size_indicators', [])),
+            'business_description': company_info.get('business_description', 'N/A')
+        }
+    
+    @staticmethod
+    def _trace_vars(company_info: Dict, category: str) -> Dict[str, str]:
+        """Input variables recorded by the prompt tracer."""
+        return {
+            "company_name": company_info['company_name'],
+            "category": category
+        }
+    
+    @staticmethod
+    def _batch_trace_vars(companies: List[Dict], category: str) -> Dict[str, str]:
+        """Input variables recorded by the prompt tracer for a batch."""
+        return {
+            "company_names": ', '.join(c['company_name'] for c in companies),
+            "category": category
+        }
+    
+    @staticmethod
+    def _batch_scores(result: Dict) -> Dict[int, Dict]:
+        """Batch score entries keyed by their 1-based company index."""
+        scores = {}
+        for entry in result.get('scores', []):
+            try:
+                scores[int(entry['index'])] = entry
+            except (KeyError, TypeError, ValueError):
+                continue
+        return scores
+    
+    def _merge_batch_scores(self, companies: List[Dict], category: str,
+                            scores: Dict[int, Dict]) -> List[Optional[Dict]]:
+        """Zip batch scores back onto their companies; None where none came back."""
+        return [
+            self._merge_result(company, category, scores[i]) if i in scores else None
+            for i, company in enumerate(companies, 1)
+        ]
+    
+    @staticmethod
+    def _missing(merged: List[Optional[Dict]]) -> List[int]:
+        """Positions of companies a batch response did not score."""
+        return [i for i, result in enumerate(merged) if result is None]
+    
+    def _merge_batch_result(self, companies: List[Dict], category: str, result: Dict) -> List[Dict]:
+        """Zip batch scores back onto their companies by index."""
+        merged = self._merge_batch_scores(companies, category, self._batch_scores(result))
+        for i in self._missing(merged):
+            logger.warning(f"  ⚠️  No score returned for {companies[i]['company_name']}")
+            merged[i] = self._error_result(companies[i], category)
+        return merged
+    
+    @staticmethod
+    def _merge_result(company_info: Dict, category: str, result: Dict) -> Dict:
+        """Merge LLM scoring output with original company info."""
+        return {
+            **company_info,
+            'fit_score': result.get('fit_score', 0),
+            'estimated_size': result.get('estimated_size', 'Medium'),
+            'rationale': result.get('rationale', ''),
+            'category': category
+        }
+    
+    @staticmethod
+    def _error_result(company_info: Dict, category: str) -> Dict:
+        """Fallback result when scoring fails."""
+        return {
+            **company_info,
+            'fit_score': 0,
+            'estimated_size': 'Medium',
+            'rationale': 'Error during scoring',
+            'category': category
+        }
+    
+    def score_companies(self, companies: list, category: str, progress_callback=None,
+                        top_n: Optional[int] = None) -> list:
+        """Score all companies (only the best top_n when given)."""
+        return asyncio.run(
+            self.score_companies_async(companies, category, progress_callback, top_n=top_n)
+        )
+    
+    async def score_companies_async(self,
+                                    companies: list,
+                                    category: str,
+                                    progress_callback=None,
+                                    max_concurrency: int = MAX_CONCURRENT_LLM_CALLS,
+                                    batch_size: int = SCORING_BATCH_SIZE,
+                                    top_n: Optional[int] = None) -> list:
+        """Score all companies in concurrent batches, then rank by fit score.
+        
+        With top_n, only the top_n best are returned, selected with a heap
+        instead of a full sort.
+        """
+        total = len(companies)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        completed = 0
+        
+        logger.info(f"\n🎯 Scoring {total} companies as {category}s...")
+        
+        async def score_batch(batch):
+            nonlocal completed
+            async with semaphore:
+                results = await self.score_company_batch_async(batch, category)
             
-            result = self.score_company(company, category)
-            scored.append(result)
-            safe_print(f"    Score: {result['fit_score']}/100")
+            for result in results:
+                completed += 1
+                logger.info(f"  [{completed}/{total}] {result['company_name']}: {result['fit_score']}/100")
+                
+                if progress_callback:
+                    progress_callback(completed, total, result['company_name'])
+            return results
+        
+        batches = [companies[i:i + batch_size] for i in range(0, total, batch_size)]
+        scored = [
+            result
+            for results in await asyncio.gather(*(score_batch(b) for b in batches))
+            for result in results
+        ]
         
         # Sort by score
-        scored.sort(key=lambda x: x['fit_score'], reverse=True)
+        if top_n is not None:
+            scored = heapq.nlargest(top_n, scored, key=lambda x: x['fit_score'])
+        else:
+            scored.sort(key=lambda x: x['fit_score'], reverse=True)
         
-        safe_print(f"\n✓ Scored and ranked {len(scored)} companies")
+        logger.info(f"\n✓ Scored and ranked {len(scored)} companies")
+        flush_logs()
         return scored
     
     @staticmethod
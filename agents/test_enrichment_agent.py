@@ -0,0 +1,103 @@
+"""Tests for the EnrichmentAgent."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agents.enrichment_agent import EnrichmentAgent
+from config import MAX_CONCURRENT_LLM_CALLS
+
+
+@pytest.fixture
+def agent():
+    return EnrichmentAgent(llm_client=None)
+
+
+@pytest.mark.parametrize("url", [
+    "https://acme.com",
+    "acme.com/about",
+    "https://acme.com/press?src=https://linkedin.com/company/acme",
+    "https://acme.com/#linkedin.com",
+])
+def test_is_valid_company_url_accepts_company_sites(agent, url):
+    assert agent._is_valid_company_url(url)
+
+
+@pytest.mark.parametrize("url", [
+    "",
+    "https://www.linkedin.com/company/acme",
+    "http://crunchbase.com/organization/acme",
+    "linkedin.com/company/acme",
+    "linkedin.com/company/acme?ref=https://acme.com",
+    "www.crunchbase.com/organization/acme?u=http://x",
+    "twitter.com#https://acme.com",
+])
+def test_is_valid_company_url_rejects_profile_sites(agent, url):
+    assert not agent._is_valid_company_url(url)
+
+
+def test_extract_website_label_ignores_whitespace_before_url(agent):
+    content = "Visit https://news.example.org today. Website:" + " " * 60 + "https://acme.com/home"
+    assert agent._extract_website_from_content(content) == "https://acme.com/home"
+
+
+def test_extract_website_prefers_website_label(agent):
+    content = (
+        "Read more at https://news.example.org/story. Visit us at https://visit.acme.com. "
+        "Website: https://acme.com/about"
+    )
+    assert agent._extract_website_from_content(content) == "https://acme.com/about"
+
+
+def test_extract_website_falls_back_to_visit_label_then_bare_domain(agent):
+    assert agent._extract_website_from_content(
+        "Read https://news.example.org/x and visit us at https://acme.com/contact"
+    ) == "https://acme.com/contact"
+    assert agent._extract_website_from_content(
+        "Profile https://linkedin.com/company/acme, more at https://acme.com/team"
+    ) == "https://acme.com"
+
+
+def test_extract_website_skips_profile_sites(agent):
+    content = "Website: https://www.linkedin.com/company/acme"
+    assert agent._extract_website_from_content(content) is None
+    assert agent._extract_website_from_content("no links here") is None
+
+
+def test_enrich_companies_async_reaches_concurrency_limit(agent):
+    lock = threading.Lock()
+    running = peak = 0
+
+    def extract_company_info(search_result, additional_criteria=""):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return {'company_name': search_result['title']}
+
+    agent.extract_company_info = extract_company_info
+    results = [{'title': f'Company {i}'} for i in range(2 * MAX_CONCURRENT_LLM_CALLS)]
+    enriched = asyncio.run(agent.enrich_companies_async(results))
+    assert [c['company_name'] for c in enriched] == [r['title'] for r in results]
+    assert peak == MAX_CONCURRENT_LLM_CALLS
+
+
+def test_criteria_check_sees_page_excerpt():
+    prompts = {}
+
+    class FakeLLM:
+        def generate_json_with_trace(self, prompt, prompt_name, **kwargs):
+            prompts[prompt_name] = prompt
+            if prompt_name == "ENRICHMENT_CHECK_CRITERIA":
+                return {'criteria_match': False, 'match_reason': 'No CRM mentioned'}
+            return {'company_name': 'Acme', 'website_url': 'https://acme.com', 'locations': ['Austin, TX']}
+
+    search_result = {'title': 'Acme', 'url': 'https://acme.com', 'content': 'Acme runs on Salesforce. ' * 100}
+    company = EnrichmentAgent(FakeLLM()).extract_company_info(search_result, "uses Salesforce")
+    assert company['criteria_match'] is False
+    assert 'Acme runs on Salesforce.' in prompts["ENRICHMENT_CHECK_CRITERIA"]
+    assert search_result['content'] not in prompts["ENRICHMENT_CHECK_CRITERIA"]
@@ -0,0 +1,23 @@
+"""Tests for ResearchAgent content cleanup."""
+from agents.research_agent import ResearchAgent
+
+
+def test_clean_content_strips_boilerplate_lines():
+    page = (
+        "Skip to main content\n"
+        "Home | About Us | Products | Contact\n"
+        "Acme Motors is a dealer group based in Austin, TX.\n"
+        "We use cookies to improve your experience. Accept all cookies\n"
+        "It runs   12 stores.\n"
+        "© 2024 Acme Motors. All rights reserved.\n"
+        "Privacy Policy · Terms of Use\n"
+    )
+    assert ResearchAgent._clean_content(page) == (
+        "Acme Motors is a dealer group based in Austin, TX. It runs 12 stores."
+    )
+
+
+def test_clean_content_keeps_prose_and_cuts_on_sentence_end():
+    text = "Acme bakes cookies for dealers. " * 10
+    cleaned = ResearchAgent._clean_content(text, max_chars=100)
+    assert cleaned == "Acme bakes cookies for dealers. Acme bakes cookies for dealers. Acme bakes cookies for dealers."
@@ -0,0 +1,97 @@
+"""Tests for the ScoringAgent."""
+import asyncio
+import threading
+import time
+
+from agents.scoring_agent import ScoringAgent
+from config import MAX_CONCURRENT_LLM_CALLS
+
+
+def _company(name):
+    return {
+        'company_name': name,
+        'website_url': f'https://{name.lower()}.com',
+        'locations': ['Austin, TX'],
+        'size_indicators': [],
+        'business_description': 'Dealer software',
+    }
+
+
+class FakeLLM:
+    """Answers batch prompts with `batch_response` and single prompts by name."""
+
+    def __init__(self, batch_response):
+        self.batch_response = batch_response
+        self.prompts = []
+
+    def generate_json_with_trace(self, prompt, prompt_name, **kwargs):
+        self.prompts.append(prompt_name)
+        if prompt_name == "SCORING_EVALUATE_COMPANIES_BATCH":
+            if isinstance(self.batch_response, Exception):
+                raise self.batch_response
+            return self.batch_response
+        return {'fit_score': 30, 'estimated_size': 'Small', 'rationale': 'Scored alone'}
+
+
+def test_merge_batch_result_matches_scores_by_index():
+    agent = ScoringAgent(llm_client=None, company_context='')
+    companies = [_company('Acme'), _company('Globex'), _company('Initech')]
+    result = {'scores': [
+        {'index': 3, 'fit_score': 70, 'estimated_size': 'Large', 'rationale': 'Third'},
+        {'index': '1', 'fit_score': 90, 'estimated_size': 'Medium', 'rationale': 'First'},
+        {'fit_score': 10},  # No index: ignored
+        {'index': 'two', 'fit_score': 10},  # Bad index: ignored
+    ]}
+    merged = agent._merge_batch_result(companies, 'Customer', result)
+    assert [(c['company_name'], c['fit_score'], c['rationale']) for c in merged] == [
+        ('Acme', 90, 'First'),
+        ('Globex', 0, 'Error during scoring'),
+        ('Initech', 70, 'Third'),
+    ]
+    assert all(c['category'] == 'Customer' for c in merged)
+
+
+def test_score_company_batch_rescores_missing_companies_alone():
+    llm = FakeLLM({'scores': [{'index': 2, 'fit_score': 80, 'rationale': 'Batch'}]})
+    agent = ScoringAgent(llm, company_context='')
+    companies = [_company('Acme'), _company('Globex')]
+
+    for scored in (agent.score_company_batch(companies, 'Customer'),
+                   asyncio.run(agent.score_company_batch_async(companies, 'Customer'))):
+        assert [(c['company_name'], c['fit_score'], c['rationale']) for c in scored] == [
+            ('Acme', 30, 'Scored alone'),
+            ('Globex', 80, 'Batch'),
+        ]
+    assert llm.prompts.count("SCORING_EVALUATE_COMPANY") == 2
+
+
+def test_score_company_batch_falls_back_when_the_batch_call_fails():
+    llm = FakeLLM(RuntimeError('timeout'))
+    agent = ScoringAgent(llm, company_context='')
+    companies = [_company('Acme'), _company('Globex')]
+
+    scored = asyncio.run(agent.score_company_batch_async(companies, 'Partner'))
+    assert [(c['company_name'], c['fit_score']) for c in scored] == [('Acme', 30), ('Globex', 30)]
+    assert llm.prompts == ["SCORING_EVALUATE_COMPANIES_BATCH"] + ["SCORING_EVALUATE_COMPANY"] * 2
+
+
+def test_score_companies_async_reaches_concurrency_limit():
+    agent = ScoringAgent(llm_client=None, company_context='')
+    lock = threading.Lock()
+    running = peak = 0
+
+    def score_batch_once(companies, category):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return [{**company, 'fit_score': 50, 'category': category} for company in companies]
+
+    agent._score_batch_once = score_batch_once
+    companies = [_company(f'Company{i}') for i in range(2 * MAX_CONCURRENT_LLM_CALLS)]
+    scored = asyncio.run(agent.score_companies_async(companies, 'Customer', batch_size=1))
+    assert len(scored) == len(companies)
+    assert peak == MAX_CONCURRENT_LLM_CALLS
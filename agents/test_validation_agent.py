@@ -0,0 +1,77 @@
+"""Tests for the ValidationAgent."""
+from agents.validation_agent import ValidationAgent
+
+
+def _company(name, url, score=50, **fields):
+    return {
+        'company_name': name,
+        'website_url': url,
+        'fit_score': score,
+        'rationale': 'Fits',
+        'category': 'customer',
+        'locations': ['Austin, TX'],
+        'estimated_size': 'Medium',
+        **fields,
+    }
+
+
+def test_deduplicate_drops_repeated_urls_and_similar_names():
+    companies = [
+        _company('Tekion', 'https://tekion.com'),
+        _company('Other Name', 'http://www.tekion.com/'),
+        _company('Tekion Corp', 'https://tekioncorp.io'),
+        _company('Acme Inc.', 'https://acme.com'),
+        _company('Globex', 'https://globex.com'),
+    ]
+    unique = ValidationAgent().deduplicate(companies)
+    assert [c['company_name'] for c in unique] == ['Tekion', 'Acme Inc.', 'Globex']
+
+
+def test_unique_filter_keeps_state_between_calls():
+    is_new = ValidationAgent().unique_filter()
+    assert is_new(_company('Acme', 'https://acme.com'))
+    assert not is_new(_company('ACME, Inc.', 'https://acme.org'))
+    assert is_new(_company('Initech', 'https://initech.com'))
+    # A fresh filter has no memory of earlier companies
+    assert ValidationAgent().unique_filter()(_company('Acme', 'https://acme.com'))
+
+
+def test_validate_company_reports_reason():
+    agent = ValidationAgent(min_score=40)
+    assert agent.validate_company(_company('Acme', 'https://acme.com', score=10)) == (False, "Score too low: 10")
+    assert agent.validate_company(_company('Acme', 'https://acme.com', rationale='')) == (False, "Missing rationale")
+    assert agent.validate_company(_company('Acme', 'not a url')) == (False, "Invalid URL")
+    assert agent.validate_company(_company('Acme', 'https://acme.com', locations=['Location not specified']))[0] is False
+    assert agent.validate_company(_company('Acme', 'https://acme.com')) == (True, "Valid")
+
+
+def test_validate_and_filter_returns_top_n_by_score():
+    companies = [
+        _company('A', 'https://a.com', score=60),
+        _company('B', 'https://b.com', score=90),
+        _company('Low', 'https://low.com', score=20),
+        _company('C', 'https://c.com', score=75),
+        _company('D', 'https://d.com', score=75),
+        _company('Bad URL', 'ftp://bad', score=99),
+        _company('E', 'https://e.com', score=50),
+    ]
+    top = ValidationAgent(min_score=40).validate_and_filter(companies, top_n=3)
+    # Ties keep input order
+    assert [c['company_name'] for c in top] == ['B', 'C', 'D']
+
+
+def test_validate_and_filter_skips_companies_that_cannot_make_the_top_n():
+    agent = ValidationAgent()
+    validated = []
+    validate_company = agent.validate_company
+    agent.validate_company = lambda company: validated.append(company['company_name']) or validate_company(company)
+    companies = [_company('A', 'https://a.com', score=80), _company('B', 'https://b.com', score=70)]
+    assert [c['company_name'] for c in agent.validate_and_filter(companies, top_n=1)] == ['A']
+    assert validated == ['A']
+
+
+def test_validate_and_filter_fixes_unknown_size_and_handles_zero_top_n():
+    companies = [_company('A', 'https://a.com', estimated_size='Huge')]
+    agent = ValidationAgent()
+    assert agent.validate_and_filter(companies, top_n=0) == []
+    assert agent.validate_and_filter(companies, top_n=5)[0]['estimated_size'] == 'Medium'
@@ -1,14 +1,67 @@
 """Validation Agent - Ensures data quality."""
-from typing import List, Dict, Tuple
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Tuple
+import heapq
+import logging
 import re
 
+try:
+    from rapidfuzz import fuzz, process  # C edit-distance scoring (optional)
+except ImportError:
+    fuzz = process = None
 
-def safe_print(msg):
-    """Print with error handling."""
-    try:
-        print(msg)
-    except:
-        pass
+
+# Basic URL pattern
+_URL_VALID = re.compile(r'^https?://[a-zA-Z0-9][-a-zA-Z0-9.]*\.[a-zA-Z]{2,}', re.ASCII)
+_REQUIRED_FIELDS = ('company_name', 'website_url', 'fit_score', 'rationale', 'category', 'locations')
+_VALID_SIZES = frozenset(('Small', 'Medium', 'Large'))
+_NAME_SIMILARITY_CUTOFF = 85  # fuzz.ratio score (0-100) for near-duplicate names
+# Trailing company suffixes, stacked ones included ("acme tech inc.")
+_COMPANY_SUFFIX = re.compile(
+    r'(?:\s+(?:inc|corp|corporation|llc|ltd|limited|co|company|group|technologies|tech)\.?)+$'
+)
+_URL_PREFIX = re.compile(r'^(?:https?://)?(?:www\.)?', re.ASCII)  # Stripped before comparing URLs
+_NON_ALNUM = re.compile(r'[\W_]+')  # Anything str.isalnum() rejects
+_ASCII_NON_ALNUM = bytes(b for b in range(128) if not chr(b).isalnum())  # Deleted by bytes.translate
+_NAME_GRAM = 2  # Character n-gram size for name blocking
+
+
+logger = logging.getLogger(__name__)
+
+
+class _NameIndex:
+    """Blocking index of normalized names by character bigram.
+    
+    Similar names share bigrams (a substring shares all of its own), so a new
+    name is only compared with names it shares one with, instead of every
+    name seen so far.
+    """
+    
+    def __init__(self):
+        self._order: Dict[str, int] = {}
+        self._grams: Dict[str, List[str]] = {}
+        self._short: List[str] = []  # Names too short to have a bigram
+    
+    @staticmethod
+    def _name_grams(name: str) -> set:
+        return {name[i:i + _NAME_GRAM] for i in range(len(name) - _NAME_GRAM + 1)}
+    
+    def add(self, name: str):
+        if name in self._order:
+            return
+        self._order[name] = len(self._order)
+        if len(name) < _NAME_GRAM:
+            self._short.append(name)
+        for gram in self._name_grams(name):
+            self._grams.setdefault(gram, []).append(name)
+    
+    def candidates(self, name: str) -> List[str]:
+        """Indexed names that could be similar to `name`, oldest first."""
+        if len(name) < _NAME_GRAM:
+            return list(self._order)
+        found = set(self._short)
+        for gram in self._name_grams(name):
+            found.update(self._grams.get(gram, ()))
+        return sorted(found, key=self._order.__getitem__)
 
 
 class ValidationAgent:
@@ -21,129 +74,178 @@ class ValidationAgent:
     def validate_company(self, company: Dict) -> Tuple[bool, str]:
         """Validate a single company entry."""
         
+        # Checks run cheapest first; the URL regex goes last
+        
+        # Check score threshold (a missing/zero score is reported below)
+        score = company.get('fit_score')
+        if score and score < self.min_score:
+            return False, f"Score too low: {score}"
+        
         # Check required fields
-        required = ['company_name', 'website_url', 'fit_score', 'rationale', 'category', 'locations']
-        for field in required:
-            if not company.get(field):
-                return False, f"Missing {field}"
+        missing = next((field for field in _REQUIRED_FIELDS if not company.get(field)), None)
+        if missing:
+            return False, f"Missing {missing}"
         
-        # Check score threshold
-        if company['fit_score'] < self.min_score:
-            return False, f"Score too low: {company['fit_score']}"
+        # Check locations are meaningful (presence is checked above)
+        if company['locations'] == ['Location not specified']:
+            return False, "No valid location information"
         
         # Validate URL format
         if not self._is_valid_url(company['website_url']):
             return False, "Invalid URL"
         
-        # Check locations exist and are meaningful
-        locations = company.get('locations', [])
-        if not locations or len(locations) == 0 or locations == ['Location not specified']:
-            return False, "No valid location information"
-        
         # Validate size
-        if company.get('estimated_size') not in ['Small', 'Medium', 'Large']:
+        if company.get('estimated_size') not in _VALID_SIZES:
             company['estimated_size'] = 'Medium'
         
         return True, "Valid"
     
-    def validate_and_filter(self, companies: List[Dict], top_n: int = 10) -> List[Dict]:
-        """Validate and return top N companies."""
-        safe_print(f"\n✅ Validating {len(companies)} companies...")
-        
-        valid_companies = []
-        
+    def iter_valid(self, companies: Iterable[Dict]) -> Iterator[Dict]:
+        """Lazily yield the companies that pass validation, in input order."""
         for company in companies:
             is_valid, reason = self.validate_company(company)
             
             if is_valid:
-                valid_companies.append(company)
+                yield company
             else:
-                safe_print(f"  ✗ {company.get('company_name', 'Unknown')}: {reason}")
+                logger.info(f"  ✗ {company.get('company_name', 'Unknown')}: {reason}")
+    
+    def validate_and_filter(self, companies: List[Dict], top_n: int = 10) -> List[Dict]:
+        """Validate and return the top N companies by fit score.
+        
+        Keeps a size-N min-heap of valid companies; once it is full, companies
+        that cannot beat its lowest score are skipped without validation.
+        Ties keep input order.
+        """
+        logger.info(f"\n✅ Validating {len(companies)} companies...")
+        
+        heap = []  # (fit_score, -order, company)
+        passed = 0
+        
+        # Read lazily, so the skip test sees the heap as it fills
+        candidates = (
+            company for company in companies
+            if not (heap and len(heap) >= top_n and self._cannot_beat(company, heap[0][0]))
+        )
+        
+        for company in self.iter_valid(candidates):
+            entry = (company['fit_score'], -passed, company)
+            passed += 1
+            if len(heap) < top_n:
+                heapq.heappush(heap, entry)
+            elif top_n > 0:
+                heapq.heappushpop(heap, entry)
         
-        safe_print(f"✓ {len(valid_companies)} companies passed validation")
+        logger.info(f"✓ {passed} companies passed validation")
         
         # Return top N
-        result = valid_companies[:top_n]
-        safe_print(f"✓ Returning top {len(result)} companies")
+        result = [company for _, _, company in sorted(heap, key=lambda e: e[:2], reverse=True)]
+        logger.info(f"✓ Returning top {len(result)} companies")
         
         return result
     
+    @staticmethod
+    def _cannot_beat(company: Dict, min_score: float) -> bool:
+        """Whether a company's score can't displace the heap's lowest score."""
+        score = company.get('fit_score')
+        return isinstance(score, (int, float)) and score <= min_score
+    
     @staticmethod
     def _is_valid_url(url: str) -> bool:
         """Check if URL is valid."""
-        if not url:
-            return False
-        
-        # Basic URL pattern
-        pattern = r'^https?://[a-zA-Z0-9][-a-zA-Z0-9.]*\.[a-zA-Z]{2,}'
-        return bool(re.match(pattern, url))
+        return bool(url) and _URL_VALID.match(url) is not None
     
     def deduplicate(self, companies: List[Dict]) -> List[Dict]:
         """Remove duplicate companies based on name similarity and URL."""
+        is_new = self.unique_filter()
+        unique = [company for company in companies if is_new(company)]
+        
+        if len(unique) < len(companies):
+            logger.info(f"  ℹ️  Removed {len(companies) - len(unique)} duplicates")
+        
+        return unique
+    
+    def unique_filter(self) -> Callable[[Dict], bool]:
+        """Stateful predicate that is False for duplicates of companies it already passed.
+        
+        Lets callers deduplicate companies as they arrive instead of as a list.
+        """
         seen_urls = set()
         seen_names = {}
-        unique = []
+        name_index = _NameIndex()
         
-        for company in companies:
-            # Normalize URL for comparison
-            url = self._normalize_url(company.get('website_url', ''))
-            
-            # Normalize name for comparison
-            name = self._normalize_name(company.get('company_name', ''))
+        def is_new(company: Dict) -> bool:
+            url, name = self._normalized_keys(company)
             
             # Check if URL already seen
             if url and url in seen_urls:
-                safe_print(f"  ℹ️  Duplicate URL: {company['company_name']}")
-                continue
+                logger.info(f"  ℹ️  Duplicate URL: {company['company_name']}")
+                return False
             
-            # Check if similar name already seen
-            is_duplicate = False
-            for seen_name in seen_names.keys():
-                if self._names_are_similar(name, seen_name):
-                    safe_print(f"  ℹ️  Similar name: {company['company_name']} ≈ {seen_names[seen_name]}")
-                    is_duplicate = True
-                    break
+            # Check if the same or a similar name was already seen
+            if name and name in seen_names:
+                similar = name
+            else:
+                similar = self._find_similar_name(name, name_index.candidates(name))
+            if similar is not None:
+                logger.info(f"  ℹ️  Similar name: {company['company_name']} ≈ {seen_names[similar]}")
+                return False
             
-            if not is_duplicate:
-                if url:
-                    seen_urls.add(url)
-                seen_names[name] = company['company_name']
-                unique.append(company)
-        
-        if len(unique) < len(companies):
-            safe_print(f"  ℹ️  Removed {len(companies) - len(unique)} duplicates")
+            if url:
+                seen_urls.add(url)
+            seen_names[name] = company['company_name']
+            name_index.add(name)
+            return True
         
-        return unique
+        return is_new
+    
+    def _normalized_keys(self, company: Dict) -> Tuple[str, str]:
+        """Normalized (url, name) of a company, computed once and kept on the dict."""
+        if '_norm_url' not in company:
+            company['_norm_url'] = self._normalize_url(company.get('website_url', ''))
+        if '_norm_name' not in company:
+            company['_norm_name'] = self._normalize_name(company.get('company_name', ''))
+        return company['_norm_url'], company['_norm_name']
     
     @staticmethod
     def _normalize_url(url: str) -> str:
         """Normalize URL for comparison."""
-        if not url:
-            return ''
         # Remove protocol, www, trailing slash
-        url = url.lower()
-        url = url.replace('https://', '').replace('http://', '')
-        url = url.replace('www.', '')
-        url = url.rstrip('/')
-        return url
+        return _URL_PREFIX.sub('', url.lower(), count=1).rstrip('/') if url else ''
     
     @staticmethod
     def _normalize_name(name: str) -> str:
         """Normalize company name for comparison."""
         if not name:
             return ''
-        # Lowercase, remove common suffixes, remove spaces/punctuation
-        name = name.lower()
+        # Casefold, remove common suffixes, remove spaces/punctuation
+        name = name.casefold()
         # Remove common company suffixes
-        suffixes = [' inc', ' inc.', ' corp', ' corp.', ' corporation', 
-                   ' llc', ' ltd', ' ltd.', ' limited', ' co', ' co.', 
-                   ' company', ' group', ' technologies', ' tech']
-        for suffix in suffixes:
-            if name.endswith(suffix):
-                name = name[:-len(suffix)]
-        # Remove all non-alphanumeric
-        name = ''.join(c for c in name if c.isalnum())
-        return name
+        name = _COMPANY_SUFFIX.sub('', name)
+        # Remove all non-alphanumeric (byte-level delete for the common ASCII case)
+        if name.isascii():
+            return name.encode('ascii').translate(None, _ASCII_NON_ALNUM).decode('ascii')
+        return _NON_ALNUM.sub('', name)
+    
+    @classmethod
+    def _find_similar_name(cls, name: str, candidates: Iterable[str]) -> Optional[str]:
+        """Return a candidate normalized name similar to `name`, if any."""
+        if not name:
+            return None
+        if fuzz is None:
+            return next((seen for seen in candidates if cls._names_are_similar(name, seen)), None)
+        
+        # One is substring of the other (e.g., "tekion" in "tekioncorp")
+        candidates = list(candidates)
+        for seen in candidates:
+            if seen and (name in seen or seen in name):
+                return seen
+        
+        # Best edit-distance match over the candidates in one C scan
+        match = process.extractOne(
+            name, candidates, scorer=fuzz.ratio, score_cutoff=_NAME_SIMILARITY_CUTOFF
+        )
+        return match[0] if match else None
     
     @staticmethod
     def _names_are_similar(name1: str, name2: str) -> bool:
@@ -159,16 +261,21 @@ class ValidationAgent:
         if name1 in name2 or name2 in name1:
             return True
         
-        # Calculate similarity ratio (simple approach)
+        if fuzz is not None:
+            # score_cutoff lets RapidFuzz bail out early (e.g. on the length bound)
+            return fuzz.ratio(name1, name2, score_cutoff=_NAME_SIMILARITY_CUTOFF) > 0
+        
+        # Fallback without rapidfuzz: positional character overlap
         # If names are very similar (>80% overlap)
         shorter = min(len(name1), len(name2))
         longer = max(len(name1), len(name2))
         
-        if shorter == 0:
+        # At most `shorter` characters can match, so the ratio can't beat shorter/longer
+        if shorter <= 0.8 * longer:
             return False
         
         # Count matching characters in order
-        matches = sum(1 for i in range(shorter) if i < len(name1) and i < len(name2) and name1[i] == name2[i])
+        matches = sum(1 for i in range(shorter) if name1[i] == name2[i])
         similarity = matches / longer
         
         return similarity > 0.8
@@ -1,17 +1,19 @@
 """Streamlit UI for AxleWave Discovery."""
 import streamlit as st
-import pandas as pd
 import os
 import sys
 
 sys.path.insert(0, os.path.dirname(__file__))
 
-from config import VECTOR_STORE_DIR
-from utils.vector_store import VectorStore
-from utils.llm_client import LLMClient
-from utils.rag import RAGSystem
-from orchestrator import CompanyDiscoveryOrchestrator
+from config import VECTOR_STORE_DIR, ENRICHMENT_MODEL, SCORING_MODEL
+from utils.logging_setup import setup_logging
+from utils.prompt_tracer import get_tracer
+from utils import fast_json
 
+setup_logging()
+
+# Company fields that hold lists (normalized in EnrichmentAgent._process_result)
+_LIST_FIELDS = ('locations', 'size_indicators')
 
 # Page config
 st.set_page_config(
@@ -82,27 +84,23 @@ if st.button("🔍 Discover Companies"):
         st.session_state.results = None
     
     try:
+        # Heavy imports (chromadb, sentence-transformers) wait for the first search
+        from utils.vector_store import VectorStore
+        from utils.llm_client import LLMClient
+        from utils.rag import RAGSystem
+        from orchestrator import CompanyDiscoveryOrchestrator
+        
         # Initialize vector store (cached once)
         @st.cache_resource
         def get_vector_store():
             """Load and cache vector store."""
             vector_store = VectorStore()
             
-            # Load documents if empty (first run)
-            if not vector_store.is_populated():
-                from utils.document_loader import load_axlewave_documents
-                docs_dir = os.path.join(os.path.dirname(__file__), "data", "axlewave_docs")
-                documents = load_axlewave_documents(docs_dir)
-                
-                all_chunks = []
-                for doc in documents:
-                    chunks = vector_store.chunk_text(doc['content'])
-                    all_chunks.extend(chunks)
-                
-                vector_store.add_documents(
-                    documents=all_chunks,
-                    metadatas=[{"source": "axlewave_docs"} for _ in all_chunks]
-                )
+            # Index new or changed documents (everything on the first run)
+            from utils.document_loader import index_documents
+            docs_dir = os.path.join(os.path.dirname(__file__), "data", "axlewave_docs")
+            documents = index_documents(vector_store, docs_dir)
+            if documents:
                 print("Loaded {} documents into vector store".format(len(documents)))
             
             return vector_store
@@ -115,6 +113,16 @@ if st.button("🔍 Discover Companies"):
             rag = RAGSystem(_vector_store, llm)
             return rag
         
+        # Initialize orchestrator (cached per provider; builds the company profile once)
+        @st.cache_resource
+        def get_orchestrator(provider_name, _rag):
+            """Initialize and cache orchestrator with all agents."""
+            return CompanyDiscoveryOrchestrator(
+                _rag,
+                enrichment_llm=LLMClient(provider=provider_name, model=ENRICHMENT_MODEL) if ENRICHMENT_MODEL else None,
+                scoring_llm=LLMClient(provider=provider_name, model=SCORING_MODEL) if SCORING_MODEL else None
+            )
+        
         # Show initialization progress
         init_progress = st.progress(0)
         init_status = st.empty()
@@ -129,7 +137,7 @@ if st.button("🔍 Discover Companies"):
         
         init_status.text("Setting up AI agents...")
         init_progress.progress(0.9)
-        orchestrator = CompanyDiscoveryOrchestrator(rag)
+        orchestrator = get_orchestrator(selected_provider, rag)
         
         init_progress.progress(1.0)
         init_status.empty()
@@ -173,37 +181,22 @@ if st.button("🔍 Discover Companies"):
 
 # Display results
 if st.session_state.get('results'):
+    import pandas as pd
+    
     st.markdown("---")
     st.header("📊 Results")
     
     results = st.session_state.results
     
-    # Create DataFrame
-    df = pd.DataFrame(results)
-    
-    # Format for display
-    display_df = df[[
-        'company_name', 
-        'website_url', 
-        'locations', 
-        'estimated_size', 
-        'fit_score',
-        'category'
-    ]].copy()
-    
-    display_df.columns = [
-        'Company Name',
-        'Website',
-        'Locations',
-        'Size',
-        'Fit Score',
-        'Category'
-    ]
-    
-    # Convert lists to strings
-    display_df['Locations'] = display_df['Locations'].apply(
-        lambda x: ', '.join(x) if isinstance(x, list) else x
-    )
+    # Build only the display columns
+    display_df = pd.DataFrame({
+        'Company Name': [r['company_name'] for r in results],
+        'Website': [r['website_url'] for r in results],
+        'Locations': [', '.join(r['locations']) for r in results],
+        'Size': [r['estimated_size'] for r in results],
+        'Fit Score': [r['fit_score'] for r in results],
+        'Category': [r['category'] for r in results]
+    })
     
     # Display table
     st.dataframe(display_df)
@@ -257,8 +250,15 @@ if st.session_state.get('results'):
     col1, col2 = st.columns(2)
     
     with col1:
-        # CSV export
-        csv = df.to_csv(index=False)
+        # CSV export (full rows as in main.py; internal fields left out)
+        rows = []
+        for company in results:
+            row = {key: value for key, value in company.items() if not key.startswith('_')}
+            for key in _LIST_FIELDS:
+                if key in row:
+                    row[key] = ', '.join(row[key])
+            rows.append(row)
+        csv = pd.DataFrame(rows).to_csv(index=False)
         st.download_button(
             "📥 Download CSV",
             csv,
@@ -269,8 +269,7 @@ if st.session_state.get('results'):
     
     with col2:
         # JSON export
-        import json
-        json_str = json.dumps(results, indent=2)
+        json_str = fast_json.dumps(results, indent=True)
         st.download_button(
             "📥 Download JSON",
             json_str,
@@ -303,9 +302,6 @@ with st.expander("💡 How Costs & Latency Are Calculated"):
     """)
 
 with st.expander("View Prompt Execution Metrics", expanded=False):
-    from utils.prompt_tracer import get_tracer
-    import json
-    
     tracer = get_tracer()
     stats = tracer.get_stats()
     
@@ -362,8 +358,7 @@ with st.expander("View Prompt Execution Metrics", expanded=False):
                             "Total Cost": "${:.4f}".format(pstats["count"] * pstats["avg_tokens"] * 0.000002)
                         })
                     
-                    prompt_df = pd.DataFrame(prompt_data)
-                    st.dataframe(prompt_df, use_container_width=True)
+                    st.dataframe(prompt_data, use_container_width=True)
                     st.markdown("")  # Spacing
         
         # Recent traces with pagination
@@ -390,6 +385,8 @@ with st.expander("View Prompt Execution Metrics", expanded=False):
                     "Cost ($)": trace.get("estimated_cost", 0)
                 })
             
+            import pandas as pd
+            
             trace_df = pd.DataFrame(trace_data)
             st.dataframe(trace_df, use_container_width=True)
             
@@ -407,7 +404,7 @@ with st.expander("View Prompt Execution Metrics", expanded=False):
                 )
             
             with col2:
-                json_str = json.dumps(recent, indent=2)
+                json_str = fast_json.dumps(recent, indent=True)
                 st.download_button(
                     "📥 Download Traces (JSON)",
                     json_str,
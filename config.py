@@ -21,16 +21,23 @@ LANGCHAIN_API_KEY = os.getenv("LANGCHAIN_API_KEY")
 # LLM Settings
 DEFAULT_LLM_PROVIDER = "perplexity"
 DEFAULT_MODEL = "gpt-4o-mini"
+ENRICHMENT_MODEL = os.getenv("ENRICHMENT_MODEL")  # Extraction model override (None = provider default)
+SCORING_MODEL = os.getenv("SCORING_MODEL")  # Scoring model override, e.g. "gpt-4o" (None = provider default)
 TEMPERATURE = 0.1
 MAX_TOKENS = 4000
 
 # Search Settings
 MAX_SEARCH_RESULTS = 10
 SEARCH_TIMEOUT = 30
+MAX_CONTENT_CHARS = 2000  # Per-result content sent to the LLM (~500 tokens)
 
 # Agent Settings
 MAX_COMPANIES_TO_RESEARCH = 30
 TOP_N_RESULTS = 10
+MAX_CONCURRENT_LLM_CALLS = 10  # Parallel LLM requests per agent (tune to provider RPM)
+SCORING_BATCH_SIZE = 5  # Companies scored per LLM call
+OPENAI_BATCH_MODE = os.getenv("OPENAI_BATCH_MODE", "").lower() in ("1", "true", "yes")  # Use OpenAI Batch API
+FUSED_MODE = os.getenv("FUSED_MODE", "").lower() in ("1", "true", "yes")  # Extract + score in one LLM call
 
 # Vector Store Settings
 EMBEDDING_MODEL = "text-embedding-3-small"
@@ -1,19 +1,24 @@
 """Main CLI interface for AxleWave Discovery."""
 import sys
 import argparse
-import json
-import pandas as pd
+import csv
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config import VECTOR_STORE_DIR
-from utils.vector_store import AxleWaveVectorStore
+from config import VECTOR_STORE_DIR, OPENAI_BATCH_MODE, FUSED_MODE, ENRICHMENT_MODEL, SCORING_MODEL
+from utils.vector_store import VectorStore
 from utils.llm_client import LLMClient
 from utils.rag import RAGSystem
+from utils.logging_setup import setup_logging
+from utils import fast_json
 from orchestrator import CompanyDiscoveryOrchestrator
 
 
+# Company fields that hold lists (normalized in EnrichmentAgent._process_result)
+_LIST_FIELDS = ('locations', 'size_indicators')
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -47,16 +52,38 @@ def main():
         default='openai',
         help='LLM provider'
     )
+    parser.add_argument(
+        '--batch',
+        action='store_true',
+        default=OPENAI_BATCH_MODE,
+        help='Use the OpenAI Batch API for enrichment/scoring (cheaper, not real-time)'
+    )
+    parser.add_argument(
+        '--fused',
+        action='store_true',
+        default=FUSED_MODE,
+        help='Extract and score each company in a single LLM call'
+    )
+    parser.add_argument(
+        '--enrichment-model',
+        default=ENRICHMENT_MODEL,
+        help='Model for company extraction (default: provider default)'
+    )
+    parser.add_argument(
+        '--scoring-model',
+        default=SCORING_MODEL,
+        help='Model for fit scoring (default: provider default)'
+    )
     
     args = parser.parse_args()
+    setup_logging()
     
     try:
         # Initialize components
         print("🔧 Initializing system...")
         
         # Load vector store
-        vector_store = AxleWaveVectorStore(VECTOR_STORE_DIR)
-        vector_store.create_collection()
+        vector_store = VectorStore(persist_directory=str(VECTOR_STORE_DIR))
         
         # Initialize LLM
         llm = LLMClient(provider=args.provider)
@@ -65,7 +92,13 @@ def main():
         rag = RAGSystem(vector_store, llm)
         
         # Initialize orchestrator
-        orchestrator = CompanyDiscoveryOrchestrator(rag)
+        orchestrator = CompanyDiscoveryOrchestrator(
+            rag,
+            batch_mode=args.batch,
+            fused=args.fused,
+            enrichment_llm=LLMClient(provider=args.provider, model=args.enrichment_model) if args.enrichment_model else None,
+            scoring_llm=LLMClient(provider=args.provider, model=args.scoring_model) if args.scoring_model else None
+        )
         
         # Run discovery
         query_type = args.type.rstrip('s')  # customers -> customer
@@ -89,18 +122,23 @@ def main():
         output_path = Path(args.output)
         
         if output_path.suffix == '.json':
-            with open(output_path, 'w') as f:
-                json.dump(results, f, indent=2)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(fast_json.dumps(results, indent=True))
         else:
-            # CSV
-            df = pd.DataFrame(results)
-            # Convert lists to strings
-            for col in df.columns:
-                if df[col].dtype == 'object':
-                    df[col] = df[col].apply(
-                        lambda x: ', '.join(x) if isinstance(x, list) else x
-                    )
-            df.to_csv(output_path, index=False)
+            # CSV - skip internal '_' fields and join the list fields
+            rows = []
+            for company in results:
+                row = {key: value for key, value in company.items() if not key.startswith('_')}
+                for key in _LIST_FIELDS:
+                    if key in row:
+                        row[key] = ', '.join(row[key])
+                rows.append(row)
+            # Columns in first-seen order, as a DataFrame would lay them out
+            fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+            with open(output_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+                writer.writerows(rows)
         
         print(f"\n✅ Results saved to: {output_path}")
         return 0
@@ -1,36 +1,58 @@
 """Orchestrator - Coordinates all agents."""
-from typing import List, Dict
+import asyncio
+import logging
+from typing import List, Dict, Optional, Tuple
+from config import MAX_CONCURRENT_LLM_CALLS, SCORING_BATCH_SIZE
 from agents.research_agent import ResearchAgent
 from agents.enrichment_agent import EnrichmentAgent
 from agents.scoring_agent import ScoringAgent
 from agents.validation_agent import ValidationAgent
+from agents.batch_runner import BatchRunner
+from agents.combined_agent import CombinedAgent
 from utils.llm_client import LLMClient
 from utils.rag import RAGSystem
+from utils.logging_setup import flush_logs
 
 
-def safe_print(msg):
-    """Print with error handling."""
-    try:
-        print(msg)
-    except:
-        pass
+logger = logging.getLogger(__name__)
+
+_BANNER = '=' * 60  # Section separator in progress logs
 
 
 class CompanyDiscoveryOrchestrator:
     """Orchestrates the multi-agent company discovery workflow."""
     
-    def __init__(self, rag_system: RAGSystem):
-        """Initialize orchestrator with all agents."""
+    def __init__(self,
+                 rag_system: RAGSystem,
+                 batch_mode: bool = False,
+                 fused: bool = False,
+                 enrichment_llm: Optional[LLMClient] = None,
+                 scoring_llm: Optional[LLMClient] = None):
+        """Initialize orchestrator with all agents.
+        
+        With batch_mode, enrichment and scoring prompts go through the OpenAI
+        Batch API (about half the cost, but results can take minutes to hours).
+        With fused, each search result is extracted and scored in one LLM call.
+        enrichment_llm / scoring_llm let extraction run on a smaller model than
+        scoring; both default to the RAG system's client.
+        """
+        if batch_mode and fused:
+            raise ValueError("batch_mode and fused cannot be combined")
+        
         self.rag = rag_system
         
         # Initialize agents
         self.research_agent = ResearchAgent()
-        self.enrichment_agent = EnrichmentAgent(rag_system.llm)
+        enrichment_llm = enrichment_llm or rag_system.llm
+        scoring_llm = scoring_llm or rag_system.llm
+        self.enrichment_agent = EnrichmentAgent(enrichment_llm)
         self.validation_agent = ValidationAgent(min_score=20)  # Very inclusive to ensure enough results
         
         # Get company context for scoring
         self.company_context = rag_system.get_company_profile()
-        self.scoring_agent = ScoringAgent(rag_system.llm, self.company_context)
+        self.scoring_agent = ScoringAgent(scoring_llm, self.company_context)
+        self.batch_runner = BatchRunner(rag_system.llm) if batch_mode else None
+        self.combined_agent = CombinedAgent(scoring_llm, self.company_context) if fused else None
     
     def discover(self, 
                 query_type: str,
@@ -39,22 +61,22 @@ class CompanyDiscoveryOrchestrator:
                 progress_callback=None) -> List[Dict]:
         """Run full discovery workflow."""
         
-        safe_print(f"\n{'='*60}")
-        safe_print(f"🚀 Starting {query_type.upper()} Discovery")
-        safe_print(f"{'='*60}\n")
+        logger.info(f"\n{_BANNER}")
+        logger.info(f"🚀 Starting {query_type.upper()} Discovery")
+        logger.info(f"{_BANNER}\n")
         
         # Step 1: Generate search queries using RAG
-        safe_print("📝 Step 1: Generating search queries...")
+        logger.info("📝 Step 1: Generating search queries...")
         search_queries = self.rag.generate_search_queries(query_type, additional_criteria)
         
-        safe_print(f"✓ Generated {len(search_queries)} queries:")
+        logger.info(f"✓ Generated {len(search_queries)} queries:")
         for i, q in enumerate(search_queries, 1):
-            safe_print(f"  {i}. {q}")
+            logger.info(f"  {i}. {q}")
         
         # Step 2: Research - Find companies
-        safe_print(f"\n{'='*60}")
-        safe_print("🔍 Step 2: Researching companies...")
-        safe_print(f"{'='*60}")
+        logger.info(f"\n{_BANNER}")
+        logger.info("🔍 Step 2: Researching companies...")
+        logger.info(f"{_BANNER}")
         
         # Increase search results significantly to account for filtering
         # Search for 2x the requested amount per query to ensure enough after filtering
@@ -73,13 +95,13 @@ class CompanyDiscoveryOrchestrator:
         )
         
         if not search_results:
-            safe_print("❌ No results found")
+            logger.warning("❌ No results found")
             return []
         
         # Step 3: Enrichment - Extract company data
-        safe_print(f"\n{'='*60}")
-        safe_print("🔬 Step 3: Enriching company data...")
-        safe_print(f"{'='*60}")
+        logger.info(f"\n{_BANNER}")
+        logger.info("🔬 Step 3: Enriching company data...")
+        logger.info(f"{_BANNER}")
         
         def enrichment_progress(current, total, item_name):
             if progress_callback:
@@ -87,14 +109,40 @@ class CompanyDiscoveryOrchestrator:
                 overall_progress = 0.1 + (0.5 * (current / total))
                 progress_callback(overall_progress, f"Enriching {current}/{total}: {item_name[:40]}...")
         
-        enriched_companies = self.enrichment_agent.enrich_companies(
-            search_results, 
-            additional_criteria,
-            progress_callback=enrichment_progress
-        )
+        def scoring_progress(current, total, item_name):
+            if progress_callback:
+                # Scoring is 30% of total work, starting at 60%
+                overall_progress = 0.6 + (0.3 * (current / total))
+                progress_callback(overall_progress, f"Scoring {current}/{total}: {item_name[:40]}...")
+        
+        category = "Customer" if query_type == "customer" else "Partner"
+        scored_companies = None
+        if self.combined_agent:
+            # Extraction and scoring share one call; scores are ready after this step
+            enriched_companies = self.combined_agent.extract_and_score_companies(
+                search_results,
+                category,
+                additional_criteria,
+                progress_callback=enrichment_progress
+            )
+        elif self.batch_runner:
+            enriched_companies = self.batch_runner.enrich_companies(
+                self.enrichment_agent,
+                search_results,
+                additional_criteria
+            )
+        else:
+            # Scoring overlaps enrichment; step 4 only reports the result
+            enriched_companies, scored_companies = self._enrich_and_score(
+                search_results,
+                category,
+                additional_criteria,
+                enrichment_progress,
+                scoring_progress
+            )
         
         if not enriched_companies:
-            safe_print("❌ No companies extracted")
+            logger.warning("❌ No companies extracted")
             return []
         
         # Filter by criteria match
@@ -102,43 +150,48 @@ class CompanyDiscoveryOrchestrator:
         filtered_companies = [c for c in enriched_companies if not c.get('criteria_match', True)]
         
         if filtered_companies:
-            safe_print(f"\n⚠️  Filtered out {len(filtered_companies)} companies due to criteria:")
+            logger.info(f"\n⚠️  Filtered out {len(filtered_companies)} companies due to criteria:")
             for company in filtered_companies[:5]:  # Show first 5
-                safe_print(f"  - {company['company_name']}: {company.get('match_reason', 'N/A')}")
+                logger.info(f"  - {company['company_name']}: {company.get('match_reason', 'N/A')}")
             if len(filtered_companies) > 5:
-                safe_print(f"  ... and {len(filtered_companies) - 5} more")
+                logger.info(f"  ... and {len(filtered_companies) - 5} more")
         
         if not matching_companies:
-            safe_print("❌ No companies match the criteria")
+            logger.warning("❌ No companies match the criteria")
             return []
         
-        safe_print(f"✓ {len(matching_companies)} companies match criteria")
+        logger.info(f"✓ {len(matching_companies)} companies match criteria")
         
-        # Deduplicate
-        matching_companies = self.validation_agent.deduplicate(matching_companies)
+        # Deduplicate (the pipeline did this before scoring)
+        if scored_companies is None:
+            matching_companies = self.validation_agent.deduplicate(matching_companies)
         
         # Step 4: Scoring - Rank by fit
-        safe_print(f"\n{'='*60}")
-        safe_print("🎯 Step 4: Scoring and ranking...")
-        safe_print(f"{'='*60}")
+        logger.info(f"\n{_BANNER}")
+        logger.info("🎯 Step 4: Scoring and ranking...")
+        logger.info(f"{_BANNER}")
         
-        def scoring_progress(current, total, item_name):
-            if progress_callback:
-                # Scoring is 30% of total work, starting at 60%
-                overall_progress = 0.6 + (0.3 * (current / total))
-                progress_callback(overall_progress, f"Scoring {current}/{total}: {item_name[:40]}...")
-        
-        category = "Customer" if query_type == "customer" else "Partner"
-        scored_companies = self.scoring_agent.score_companies(
-            matching_companies, 
-            category,
-            progress_callback=scoring_progress
-        )
+        if scored_companies is not None:
+            logger.info(f"✓ Scored and ranked {len(scored_companies)} companies")
+        elif self.combined_agent:
+            scored_companies = sorted(matching_companies, key=lambda x: x['fit_score'], reverse=True)
+        elif self.batch_runner:
+            scored_companies = self.batch_runner.score_companies(
+                self.scoring_agent,
+                matching_companies,
+                category
+            )
+        else:
+            scored_companies = self.scoring_agent.score_companies(
+                matching_companies, 
+                category,
+                progress_callback=scoring_progress
+            )
         
         # Step 5: Validation - Filter and return top N
-        safe_print(f"\n{'='*60}")
-        safe_print("✅ Step 5: Validating results...")
-        safe_print(f"{'='*60}")
+        logger.info(f"\n{_BANNER}")
+        logger.info("✅ Step 5: Validating results...")
+        logger.info(f"{_BANNER}")
         
         if progress_callback:
             progress_callback(0.95, "Validating results...")
@@ -155,12 +208,128 @@ class CompanyDiscoveryOrchestrator:
         if filtered_companies and final_results:
             final_results[0]['_filtered_companies'] = filtered_companies
         
-        safe_print(f"\n{'='*60}")
-        safe_print(f"✅ Discovery Complete: {len(final_results)} companies")
-        safe_print(f"{'='*60}\n")
+        logger.info(f"\n{_BANNER}")
+        logger.info(f"✅ Discovery Complete: {len(final_results)} companies")
+        logger.info(f"{_BANNER}\n")
+        flush_logs()
         
         return final_results
     
+    def _enrich_and_score(self,
+                          search_results: List[Dict],
+                          category: str,
+                          additional_criteria: str,
+                          enrichment_progress=None,
+                          scoring_progress=None) -> Tuple[List[Dict], List[Dict]]:
+        """Enrich search results and score the matching ones as a pipeline.
+        
+        Returns (enriched, scored): every extracted company in input order,
+        and the deduplicated criteria matches ranked by fit score.
+        """
+        return asyncio.run(self._enrich_and_score_async(
+            search_results, category, additional_criteria, enrichment_progress, scoring_progress
+        ))
+    
+    async def _enrich_and_score_async(self,
+                                      search_results: List[Dict],
+                                      category: str,
+                                      additional_criteria: str,
+                                      enrichment_progress=None,
+                                      scoring_progress=None,
+                                      max_concurrency: int = MAX_CONCURRENT_LLM_CALLS,
+                                      batch_size: int = SCORING_BATCH_SIZE) -> Tuple[List[Dict], List[Dict]]:
+        """Start scoring each batch of companies as soon as it is enriched.
+        
+        Extractions run concurrently but are consumed in input order, so the
+        deduplication winners and scoring batches are the same as when the
+        steps run one after the other.
+        """
+        total = len(search_results)
+        enrich_semaphore = asyncio.Semaphore(max_concurrency)
+        score_semaphore = asyncio.Semaphore(max_concurrency)
+        is_new = self.validation_agent.unique_filter()
+        enriched, pending, score_tasks = [], [], []
+        completed = 0
+        admitted = 0
+        duplicates = 0
+        scored_count = 0
+        expected = None  # Companies to score, known once enrichment is done
+        
+        logger.info(f"\n🔬 Enriching {total} results (scoring as they arrive)...")
+        
+        async def enrich_one(result):
+            nonlocal completed
+            async with enrich_semaphore:
+                company_info = await self.enrichment_agent.extract_company_info_async(result, additional_criteria)
+            
+            completed += 1
+            if enrichment_progress:
+                enrichment_progress(completed, total, result.get('title', 'Unknown'))
+            
+            if company_info:
+                logger.info(f"  [{completed}/{total}] ✓ {company_info['company_name']}")
+            else:
+                logger.info(f"  [{completed}/{total}] ✗ Skipped (not a company)")
+            return company_info
+        
+        def report_scoring(item_name):
+            # The scoring total is only known after enrichment finishes
+            if scoring_progress and expected:
+                scoring_progress(scored_count, expected, item_name)
+        
+        async def score_batch(batch):
+            nonlocal scored_count
+            async with score_semaphore:
+                results = await self.scoring_agent.score_company_batch_async(batch, category)
+            
+            for result in results:
+                scored_count += 1
+                logger.info(f"  🎯 {result['company_name']}: {result['fit_score']}/100")
+                report_scoring(result['company_name'])
+            return results
+        
+        def submit(batch):
+            score_tasks.append(asyncio.create_task(score_batch(batch)))
+        
+        enrich_tasks = [asyncio.create_task(enrich_one(r)) for r in search_results]
+        for task in enrich_tasks:
+            company_info = await task
+            if not company_info:
+                continue
+            enriched.append(company_info)
+            
+            if not company_info.get('criteria_match', True):
+                continue
+            if not is_new(company_info):
+                duplicates += 1
+                continue
+            
+            admitted += 1
+            pending.append(company_info)
+            if len(pending) == batch_size:
+                submit(pending)
+                pending = []
+        if pending:
+            submit(pending)
+        
+        if duplicates:
+            logger.info(f"  ℹ️  Removed {duplicates} duplicates")
+        
+        expected = admitted
+        if scored_count:
+            report_scoring("batches scored during enrichment")
+        
+        scored = [
+            result
+            for results in await asyncio.gather(*score_tasks)
+            for result in results
+        ]
+        scored.sort(key=lambda x: x['fit_score'], reverse=True)
+        
+        logger.info(f"\n✓ Enriched {len(enriched)} companies, scored {len(scored)}")
+        flush_logs()
+        return enriched, scored
+    
     def format_results(self, companies: List[Dict]) -> str:
         """Format results for display."""
         output = []
@@ -8,6 +8,7 @@ All prompts used across the system are defined here for:
 - Performance tracking and optimization
 - Documentation and auditability
 """
+from string import Formatter
 
 # ============================================================================
 # RAG SYSTEM PROMPTS
@@ -88,6 +89,62 @@ Examples:
 Return ONLY valid JSON. If this is not about a real company, return {{"company_name": null}}"""
 
 
+# ENRICHMENT_EXTRACT_COMPANY_INFO without the criteria fields, for runs
+# without additional criteria (criteria_match is then always true)
+ENRICHMENT_EXTRACT_COMPANY_BASE = """Extract company information from this search result:
+
+Title: {title}
+URL: {url}
+Content: {content}
+
+Extract and return JSON with:
+- company_name: Official company name (or null if not a company)
+- website_url: Main company website URL (IMPORTANT: Extract the actual company website, NOT linkedin.com, crunchbase.com, or other profile sites. Look for mentions like "visit us at", "website:", or domain names in the content)
+- locations: Array of ONLY city/state/country names (e.g., ["San Francisco, CA", "Austin, TX"]). Extract ONLY geographic locations from phrases like "based in", "located in", "headquarters in". DO NOT include descriptions, features, or non-location text.
+- size_indicators: Array of size clues (employee count, revenue, "enterprise", "startup", "Fortune 500", etc)
+- business_description: 1-sentence what they do
+
+IMPORTANT:
+- For website_url: Find the ACTUAL company domain, not profile pages
+- For locations: ONLY geographic names (cities, states, countries). NO descriptions, features, or other text
+- If you cannot find specific information, use null for that field
+
+Examples of CORRECT locations:
+- ["San Ramon, CA", "Pleasanton, CA"]
+- ["California", "Texas"]
+- ["United States"]
+
+Examples of INCORRECT locations (DO NOT include):
+- ["With its highly configurable integration and greater customer engagement capabilities, AR, San Ramon, CA"]
+- ["Based in San Francisco with offices"]
+- ["Headquarters: New York"]
+
+Return ONLY valid JSON. If this is not about a real company, return {{"company_name": null}}"""
+
+ENRICHMENT_CHECK_CRITERIA = """Does this company match the criteria?
+
+Name: {company_name}
+Website: {website_url}
+Locations: {locations}
+Size Indicators: {size_indicators}
+Description: {business_description}
+
+Page excerpt:
+{content}
+
+Criteria: {additional_criteria}
+
+Return JSON with:
+- criteria_match: true/false - Does this company match the criteria?
+- match_reason: Brief explanation (1 sentence) why it matches or doesn't match
+
+Examples:
+- Criteria "California only" + Company in Florida → criteria_match: false, match_reason: "Headquartered in Florida, not California"
+- Criteria "luxury brands" + Company sells BMW/Mercedes → criteria_match: true, match_reason: "Specializes in luxury automotive brands"
+
+Return ONLY valid JSON."""
+
+
 # ============================================================================
 # SCORING AGENT PROMPTS
 # ============================================================================
@@ -115,6 +172,35 @@ Return JSON with:
 
 Be realistic - not every company is a perfect fit."""
 
+SCORING_EVALUATE_COMPANIES_BATCH = """You are evaluating companies for AxleWave Technologies.
+
+AXLEWAVE CONTEXT:
+{company_context}
+
+COMPANIES TO EVALUATE:
+{companies}
+
+EVALUATION CRITERIA ({category}):
+{criteria}
+
+Score EACH company independently. Return JSON with a "scores" array containing one entry per company:
+- index: the company's number from the list above
+- fit_score: 0-100 (how well they fit)
+- estimated_size: "Small" | "Medium" | "Large"
+- rationale: 2-3 sentences explaining the score
+
+{{"scores": [{{"index": 1, "fit_score": 0, "estimated_size": "Medium", "rationale": "..."}}, ...]}}
+
+Be realistic - not every company is a perfect fit."""
+
+# One entry in the SCORING_EVALUATE_COMPANIES_BATCH company list
+SCORING_COMPANY_ENTRY = """[{index}]
+Name: {company_name}
+Website: {website_url}
+Locations: {locations}
+Size Indicators: {size_indicators}
+Description: {business_description}"""
+
 # Scoring criteria templates
 SCORING_CRITERIA_CUSTOMER = """
 - Automotive dealership or dealer group (HIGH priority)
@@ -133,6 +219,45 @@ SCORING_CRITERIA_PARTNER = """
 """
 
 
+# ============================================================================
+# COMBINED (EXTRACT + SCORE) PROMPTS
+# ============================================================================
+
+EXTRACT_AND_SCORE_COMPANY = """You are evaluating companies for AxleWave Technologies.
+
+AXLEWAVE CONTEXT:
+{company_context}
+
+SEARCH RESULT:
+Title: {title}
+URL: {url}
+Content: {content}
+
+Additional Criteria: {additional_criteria}
+
+EVALUATION CRITERIA ({category}):
+{criteria}
+
+First extract the company described in the search result, then score how well it fits.
+
+Return JSON with:
+- company_name: Official company name (or null if not a company)
+- website_url: Main company website URL (the ACTUAL company domain, NOT linkedin.com, crunchbase.com, or other profile sites)
+- locations: Array of ONLY city/state/country names (e.g., ["San Francisco, CA", "Austin, TX"]). NO descriptions or other text
+- size_indicators: Array of size clues (employee count, revenue, "enterprise", "startup", "Fortune 500", etc)
+- business_description: 1-sentence what they do
+- criteria_match: true/false - Does this company match the additional criteria? (If criteria is "None", return true)
+- match_reason: Brief explanation (1 sentence) why it matches or doesn't match the criteria
+- fit_score: 0-100 (how well they fit the evaluation criteria)
+- estimated_size: "Small" | "Medium" | "Large"
+- rationale: 2-3 sentences explaining the score
+
+If you cannot find specific information, use null for that field.
+Be realistic - not every company is a perfect fit.
+
+Return ONLY valid JSON. If this is not about a real company, return {{"company_name": null}}"""
+
+
 # ============================================================================
 # PROMPT METADATA (for tracking and optimization)
 # ============================================================================
@@ -159,6 +284,21 @@ PROMPT_METADATA = {
         "expected_output": "JSON with company fields or null",
         "avg_tokens": 400,
     },
+    "ENRICHMENT_EXTRACT_COMPANY_BASE": {
+        "version": "1.0",
+        "purpose": "Extract structured company data when no additional criteria are given",
+        "input_vars": ["title", "url", "content"],
+        "expected_output": "JSON with company fields (no criteria_match) or null",
+        "avg_tokens": 350,
+    },
+    "ENRICHMENT_CHECK_CRITERIA": {
+        "version": "1.1",
+        "purpose": "Check extracted company fields and a page excerpt against the additional criteria",
+        "input_vars": ["company_name", "website_url", "locations", "size_indicators",
+                       "business_description", "content", "additional_criteria"],
+        "expected_output": "JSON with criteria_match, match_reason",
+        "avg_tokens": 450,
+    },
     "SCORING_EVALUATE_COMPANY": {
         "version": "1.0",
         "purpose": "Score and rank companies by fit",
@@ -167,6 +307,21 @@ PROMPT_METADATA = {
         "expected_output": "JSON with fit_score, estimated_size, rationale",
         "avg_tokens": 600,
     },
+    "EXTRACT_AND_SCORE_COMPANY": {
+        "version": "1.0",
+        "purpose": "Extract and score a company from a search result in one call",
+        "input_vars": ["company_context", "title", "url", "content",
+                       "additional_criteria", "category", "criteria"],
+        "expected_output": "JSON with company fields plus fit_score, estimated_size, rationale",
+        "avg_tokens": 900,
+    },
+    "SCORING_EVALUATE_COMPANIES_BATCH": {
+        "version": "1.0",
+        "purpose": "Score several companies in one call, sharing the AxleWave context",
+        "input_vars": ["company_context", "companies", "category", "criteria"],
+        "expected_output": "JSON with scores array aligned by index",
+        "avg_tokens": 1200,
+    },
 }
 
 
@@ -194,3 +349,45 @@ def get_prompt_metadata(prompt_name: str) -> dict:
         Dictionary with prompt metadata
     """
     return PROMPT_METADATA.get(prompt_name, {})
+
+
+def _compile_prompt(template: str):
+    """Split a template into (literal, field) pairs once, at import.
+    
+    Returns None for templates using conversions or format specs, which are
+    left to str.format.
+    """
+    parts = []
+    for literal, field, spec, conversion in Formatter().parse(template):
+        if spec or conversion or (field is not None and not field.isidentifier()):
+            return None
+        parts.append((literal, field))
+    return parts
+
+
+# Pre-parsed templates, so rendering skips re-parsing the format string
+_COMPILED = {
+    name: _compile_prompt(value)
+    for name, value in list(globals().items())
+    if name.isupper() and isinstance(value, str)
+}
+
+
+def render_prompt(prompt_name: str, **kwargs) -> str:
+    """
+    Fill in a prompt template; equivalent to get_prompt(prompt_name).format(**kwargs).
+    
+    Args:
+        prompt_name: Name of the prompt constant
+        **kwargs: Values for the template's placeholders
+        
+    Returns:
+        Rendered prompt string
+    """
+    parts = _COMPILED.get(prompt_name)
+    if parts is None:
+        return get_prompt(prompt_name).format(**kwargs)
+    return ''.join([
+        literal if field is None else literal + str(kwargs[field])
+        for literal, field in parts
+    ])
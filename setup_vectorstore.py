@@ -6,7 +6,7 @@ import os
 sys.path.insert(0, os.path.dirname(__file__))
 
 from config import DOCS_DIR, VECTOR_STORE_DIR
-from utils.document_loader import load_axlewave_documents
+from utils.document_loader import index_documents
 from utils.vector_store import VectorStore
 
 
@@ -18,39 +18,18 @@ def setup_vectorstore():
     print("Initializing Vector Store...")
     vector_store = VectorStore(persist_directory=str(VECTOR_STORE_DIR))
     
-    # Check if already populated
-    if vector_store.is_populated():
-        print("Vector store already populated, skipping document loading")
+    # Index new or changed documents (unchanged files are not re-read)
+    print("Indexing documents from all formats (docx, pdf, xlsx, pptx)...")
+    documents = index_documents(vector_store, DOCS_DIR)
+    if not documents:
+        print("Vector store is up to date, skipping document loading")
         print("Location: {}".format(VECTOR_STORE_DIR))
         return vector_store
     
-    # Load documents
-    print("Loading documents from all formats (docx, pdf, xlsx, pptx)...")
-    documents = load_axlewave_documents(DOCS_DIR)
-    print("Loaded {} documents".format(len(documents)))
+    print("Indexed {} new or changed documents".format(len(documents)))
     for doc in documents:
         print("  - {} ({})".format(doc['filename'], doc['type']))
     
-    # Chunk and add documents
-    print("Chunking and adding documents...")
-    all_chunks = []
-    all_metadata = []
-    
-    for doc in documents:
-        chunks = vector_store.chunk_text(doc['content'], chunk_size=500, overlap=50)
-        all_chunks.extend(chunks)
-        all_metadata.extend([{
-            'source': doc['filename'],
-            'type': doc['type']
-        } for _ in chunks])
-        print("  {} chunks from {}".format(len(chunks), doc['filename']))
-    
-    print("Adding {} chunks to vector store...".format(len(all_chunks)))
-    vector_store.add_documents(
-        documents=all_chunks,
-        metadatas=all_metadata
-    )
-    
     # Test query
     print("Testing retrieval...")
     test_queries = [
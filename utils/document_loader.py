@@ -1,25 +1,68 @@
 """Load and process AxleWave company documents."""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 from zipfile import ZipFile
 import xml.etree.ElementTree as ET
 
+try:
+    from lxml import etree as lxml_etree  # libxml2 parser, much faster on large docs (optional)
+except ImportError:
+    lxml_etree = None
+
+
+_W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_P = _W_NS + 'p'
+_W_T = _W_NS + 't'
+# Extracted on threads: unzipping and (lxml) parsing run in C without the GIL
+_THREADED_TYPES = frozenset(('.docx',))
+# Workers are spawned, not forked: the Streamlit app loads documents from a
+# multithreaded server, and forking a multithreaded process can deadlock
+_PROCESS_CONTEXT = multiprocessing.get_context('spawn')
+
 
 def extract_docx_text(docx_path: Path) -> str:
-    """Extract text from .docx file."""
-    with ZipFile(docx_path) as docx:
-        xml_content = docx.read('word/document.xml')
-        tree = ET.XML(xml_content)
-        
-        namespaces = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
-        paragraphs = []
-        
-        for paragraph in tree.findall('.//w:p', namespaces):
-            texts = [node.text for node in paragraph.findall('.//w:t', namespaces) if node.text]
-            if texts:
-                paragraphs.append(''.join(texts))
+    """Extract text from .docx file.
+    
+    The document XML is streamed, and each top-level paragraph is freed once
+    its text is read, so the whole tree is never held in memory. Uses lxml
+    (installed with python-docx) when available, else ElementTree.
+    """
+    paragraphs = []
+    depth = 0  # Open paragraphs (text boxes can nest them)
+    
+    with ZipFile(docx_path) as docx, docx.open('word/document.xml') as xml_file:
+        if lxml_etree is not None:
+            # Only paragraph events reach Python
+            events = lxml_etree.iterparse(xml_file, events=('start', 'end'), tag=_W_P)
+        else:
+            events = ET.iterparse(xml_file, events=('start', 'end'))
         
-        return '\n'.join(paragraphs)
+        for event, elem in events:
+            if elem.tag != _W_P:
+                continue
+            if event == 'start':
+                depth += 1
+                continue
+            
+            depth -= 1
+            if depth:
+                continue
+            
+            # Nested paragraphs are read with (and in order after) their parent
+            for paragraph in elem.iter(_W_P):
+                texts = [node.text for node in paragraph.iter(_W_T) if node.text]
+                if texts:
+                    paragraphs.append(''.join(texts))
+            elem.clear()
+            if lxml_etree is not None:
+                # Drop the emptied elements before it as well
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+    
+    return '\n'.join(paragraphs)
 
 
 def extract_pdf_text(pdf_path: Path) -> str:
@@ -70,41 +113,122 @@ def extract_pptx_text(pptx_path: Path) -> str:
         return ""
 
 
-def load_axlewave_documents(docs_dir: Path) -> List[Dict[str, str]]:
-    """Load all AxleWave documents from directory."""
-    documents = []
+_EXTRACTORS = {
+    '.docx': extract_docx_text,
+    '.pdf': extract_pdf_text,
+    '.xlsx': extract_xlsx_text,
+    '.pptx': extract_pptx_text
+}
+
+
+def _load_document(file_path: Path) -> Optional[Dict[str, str]]:
+    """Extract one document; None if it is empty or fails to load."""
+    ext = file_path.suffix
+    try:
+        content = _EXTRACTORS[ext](file_path)
+        if content.strip():
+            return {
+                "filename": file_path.name,
+                "content": content,
+                "type": ext[1:]
+            }
+    except Exception as e:
+        print(f"Error loading {file_path.name}: {e}")
+    return None
+
+
+def find_document_files(docs_dir: Path) -> List[Path]:
+    """Supported document files in a directory, grouped by type."""
+    docs_dir = Path(docs_dir)
+    return [
+        file_path
+        for ext in _EXTRACTORS
+        for file_path in docs_dir.glob(f"*{ext}")
+    ]
+
+
+def load_axlewave_documents(docs_dir: Path,
+                            max_workers: Optional[int] = None,
+                            file_paths: Optional[List[Path]] = None) -> List[Dict[str, str]]:
+    """Load all AxleWave documents from directory (or just `file_paths`).
+    
+    Files are extracted in parallel: .docx files on threads, the rest in
+    worker processes (their parsers are CPU-bound pure Python, and processes
+    are only started if there are any). The result order does not depend on it.
+    """
+    if file_paths is None:
+        file_paths = find_document_files(docs_dir)
     
-    extractors = {
-        '.docx': extract_docx_text,
-        '.pdf': extract_pdf_text,
-        '.xlsx': extract_xlsx_text,
-        '.pptx': extract_pptx_text
-    }
+    if len(file_paths) < 2:
+        loaded = map(_load_document, file_paths)
+    else:
+        workers = min(len(file_paths), max_workers or os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as threads, \
+                ProcessPoolExecutor(max_workers=workers, mp_context=_PROCESS_CONTEXT) as processes:
+            futures = [
+                (threads if file_path.suffix in _THREADED_TYPES else processes).submit(_load_document, file_path)
+                for file_path in file_paths
+            ]
+            loaded = [future.result() for future in futures]
     
-    for ext, extractor in extractors.items():
-        for file_path in docs_dir.glob(f"*{ext}"):
-            try:
-                content = extractor(file_path)
-                if content.strip():
-                    documents.append({
-                        "filename": file_path.name,
-                        "content": content,
-                        "type": ext[1:]
-                    })
-            except Exception as e:
-                print(f"Error loading {file_path.name}: {e}")
+    return [document for document in loaded if document]
+
+
+def _fingerprint(file_path: Path) -> str:
+    """Cheap change marker for a file: size and modification time."""
+    stat = file_path.stat()
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def index_documents(vector_store, docs_dir: Path,
+                    chunk_size: int = 500, overlap: int = 50) -> List[Dict[str, str]]:
+    """Bring the vector store in line with the documents in a directory.
+    
+    Only new or changed files (by size and modification time) are extracted
+    and chunked; chunks of changed and deleted files are removed first, and
+    their embeddings are reused for chunks whose text did not change.
+    Returns the documents that were (re)indexed.
+    """
+    file_paths = find_document_files(docs_dir)
+    fingerprints = {file_path.name: _fingerprint(file_path) for file_path in file_paths}
+    indexed = vector_store.source_fingerprints()
+    
+    stale = [source for source, fingerprint in indexed.items() if fingerprints.get(source) != fingerprint]
+    known_embeddings = vector_store.source_embeddings(stale)
+    for source in stale:
+        vector_store.delete_source(source)
+    
+    changed = [file_path for file_path in file_paths if indexed.get(file_path.name) != fingerprints[file_path.name]]
+    documents = load_axlewave_documents(docs_dir, file_paths=changed)
+    
+    all_chunks, all_metadata, all_ids = [], [], []
+    for doc in documents:
+        chunks = vector_store.chunk_text(doc['content'], chunk_size=chunk_size, overlap=overlap)
+        all_chunks.extend(chunks)
+        all_metadata.extend({
+            'source': doc['filename'],
+            'type': doc['type'],
+            'fingerprint': fingerprints[doc['filename']]
+        } for _ in chunks)
+        all_ids.extend(f"{doc['filename']}#{i}" for i in range(len(chunks)))
     
+    vector_store.add_documents(
+        documents=all_chunks, metadatas=all_metadata, ids=all_ids, known_embeddings=known_embeddings
+    )
     return documents
 
 
 def create_company_context(documents: List[Dict[str, str]]) -> str:
     """Create a consolidated context about AxleWave from all documents."""
-    context_parts = []
+    # Pieces go straight into one join; no per-document string is built
+    parts = []
     
     for doc in documents:
-        context_parts.append(f"=== {doc['filename']} ===\n{doc['content']}\n")
+        if parts:
+            parts.append("\n")
+        parts.extend(("=== ", doc['filename'], " ===\n", doc['content'], "\n"))
     
-    return "\n".join(context_parts)
+    return "".join(parts)
 
 
 class DocumentLoader:
@@ -0,0 +1,62 @@
+"""Shared HTTP session so API calls reuse pooled keep-alive connections."""
+import asyncio
+import atexit
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from config import MAX_CONCURRENT_LLM_CALLS
+
+
+# Global session and executor instances
+_session = None
+_session_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_http_session() -> requests.Session:
+    """Get global HTTP session (connection pool sized for concurrent agent calls).
+    
+    Enrichment and scoring each run up to MAX_CONCURRENT_LLM_CALLS requests
+    at once when pipelined, hence twice that many pooled connections per host.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=10,
+                    pool_maxsize=MAX_CONCURRENT_LLM_CALLS * 2
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                # Close pooled keep-alive connections on exit
+                atexit.register(session.close)
+                _session = session
+    return _session
+
+
+def get_llm_executor() -> ThreadPoolExecutor:
+    """Get global thread pool for blocking LLM calls made from async code.
+    
+    Sized like the connection pool. asyncio's default executor has only
+    min(32, cpu + 4) threads, which would cap the agents' concurrency
+    below MAX_CONCURRENT_LLM_CALLS on small hosts.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=MAX_CONCURRENT_LLM_CALLS * 2,
+                    thread_name_prefix="llm"
+                )
+    return _executor
+
+
+async def run_in_llm_executor(func, *args, **kwargs):
+    """Run a blocking (LLM) call on the shared LLM thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_llm_executor(), functools.partial(func, *args, **kwargs))
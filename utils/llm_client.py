@@ -1,16 +1,60 @@
 """LLM client wrapper - supports multiple providers."""
 import os
+import re
 import requests
-import json
+from functools import lru_cache
 from typing import Optional, Dict, Any
 from .prompt_tracer import get_tracer
+from .response_cache import get_response_cache
+from .http_session import get_http_session, run_in_llm_executor
+from .retry import retry_transient
+from . import fast_json
+
+try:
+    import tiktoken  # Exact BPE token counts for traces (optional)
+except ImportError:
+    tiktoken = None
+
+
+# Body of a markdown code fence (```json or bare), closing fence optional
+_JSON_FENCE = re.compile(r'```(?:json)?\s*(.*?)\s*(?:```|$)', re.DOTALL)
+
+
+@lru_cache(maxsize=None)
+def _token_encoding(model: str):
+    """tiktoken encoding for a model (cl100k_base for other providers), or None."""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:  # Not an OpenAI model
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # E.g. the BPE file can't be downloaded
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Token count of text for a model (~4 characters per token without tiktoken)."""
+    encoding = _token_encoding(model)
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+class LLMAPIError(Exception):
+    """Non-200 response from an LLM provider."""
+    
+    def __init__(self, message: str, response: requests.Response):
+        super().__init__(message)
+        self.response = response
 
 
 class LLMClient:
     """Unified LLM client for multiple providers."""
     
     def __init__(self, provider: str = "openai", model: Optional[str] = None):
-        """Initialize LLM client."""
+        """Initialize LLM client (the provider's request format is bound here, once)."""
         self.provider = provider.lower()
         self.model = model
         
@@ -19,16 +63,41 @@ class LLMClient:
             self.model = model or "sonar"
             if not self.api_key:
                 raise ValueError("PERPLEXITY_API_KEY not set")
+            self.headers = {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            }
+            self._api_name = "Perplexity"
+            self._endpoint = "https://api.perplexity.ai/chat/completions"
+            self._build_payload = self._chat_payload
+            self._read_response = self._chat_text
         elif self.provider == "anthropic":
             self.api_key = os.getenv("ANTHROPIC_API_KEY")
             self.model = model or "claude-3-5-haiku-20241022"
             if not self.api_key:
                 raise ValueError("ANTHROPIC_API_KEY not set")
+            self.headers = {
+                "x-api-key": self.api_key,
+                "anthropic-version": "2023-06-01",
+                "content-type": "application/json"
+            }
+            self._api_name = "Anthropic"
+            self._endpoint = "https://api.anthropic.com/v1/messages"
+            self._build_payload = self._anthropic_payload
+            self._read_response = self._anthropic_text
         elif self.provider == "openai":
             self.api_key = os.getenv("OPENAI_API_KEY")
             self.model = model or "gpt-4o-mini"
             if not self.api_key:
                 raise ValueError("OPENAI_API_KEY not set")
+            self.headers = {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            }
+            self._api_name = "OpenAI"
+            self._endpoint = "https://api.openai.com/v1/chat/completions"
+            self._build_payload = self._openai_payload
+            self._read_response = self._chat_text
         else:
             raise ValueError(f"Unsupported provider: {provider}")
     
@@ -43,128 +112,119 @@ class LLMClient:
         
         try:
             result = self.generate(prompt, **kwargs)
-            # Estimate tokens (rough: ~4 chars per token)
-            tokens = (len(prompt) + len(result)) // 4
+            tokens = count_tokens(prompt, self.model) + count_tokens(result, self.model)
             tracer.end_trace(trace_id, success=True, output=result, tokens_used=tokens)
             return result
         except Exception as e:
             tracer.end_trace(trace_id, success=False, error=str(e))
             raise
     
+    @retry_transient
     def generate(self, 
                  prompt: str, 
                  system_prompt: Optional[str] = None,
                  temperature: float = 0.1,
                  max_tokens: int = 2000,
-                 json_mode: bool = False) -> str:
-        """Generate text using LLM."""
+                 json_mode: bool = False,
+                 response_format: Optional[Dict[str, Any]] = None) -> str:
+        """Generate text using LLM (retries rate limits, 5xx and timeouts).
         
-        if self.provider == "perplexity":
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
-            payload = {
-                "model": self.model,
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens
-            }
-            
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.post(
-                "https://api.perplexity.ai/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Perplexity API error: {response.status_code} - {response.text}")
-            
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-        
-        if self.provider == "anthropic":
-            headers = {
-                "x-api-key": self.api_key,
-                "anthropic-version": "2023-06-01",
-                "content-type": "application/json"
-            }
-            
-            messages = [{"role": "user", "content": prompt}]
-            
-            payload = {
-                "model": self.model,
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens
-            }
-            
-            if system_prompt:
-                payload["system"] = system_prompt
-            
-            response = requests.post(
-                "https://api.anthropic.com/v1/messages",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Anthropic API error: {response.status_code} - {response.text}")
-            
-            result = response.json()
-            return result["content"][0]["text"]
+        response_format overrides json_mode, e.g. a json_schema format from
+        utils.models for structured output. OpenAI takes it as is; Anthropic
+        gets it as a forced tool call, and the tool input is returned as JSON.
+        """
+        payload = self._build_payload(prompt, system_prompt, temperature, max_tokens, json_mode, response_format)
         
-        elif self.provider == "openai":
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
-            payload = {
-                "model": self.model,
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens
-            }
-            
-            if json_mode:
-                payload["response_format"] = {"type": "json_object"}
-            
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
-            
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-        
-        raise ValueError(f"Provider {self.provider} not implemented")
+        response = get_http_session().post(
+            self._endpoint,
+            headers=self.headers,
+            json=payload,
+            timeout=30
+        )
+        
+        if response.status_code != 200:
+            raise LLMAPIError(f"{self._api_name} API error: {response.status_code} - {response.text}", response)
+        
+        return self._read_response(response.json())
+    
+    def _chat_payload(self, prompt: str, system_prompt: Optional[str], temperature: float,
+                      max_tokens: int, json_mode: bool,
+                      response_format: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Chat completions request body (Perplexity ignores the JSON options)."""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+    
+    def _openai_payload(self, prompt: str, system_prompt: Optional[str], temperature: float,
+                        max_tokens: int, json_mode: bool,
+                        response_format: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """OpenAI chat completions request body, with JSON mode or a response format."""
+        payload = self._chat_payload(prompt, system_prompt, temperature, max_tokens, json_mode, response_format)
+        
+        if response_format:
+            payload["response_format"] = response_format
+        elif json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        
+        return payload
+    
+    def _anthropic_payload(self, prompt: str, system_prompt: Optional[str], temperature: float,
+                           max_tokens: int, json_mode: bool,
+                           response_format: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Anthropic messages request body; a json_schema format becomes a forced tool call."""
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        
+        if system_prompt:
+            payload["system"] = system_prompt
+        
+        if response_format and response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]
+            payload["tools"] = [{"name": schema["name"], "input_schema": schema["schema"]}]
+            payload["tool_choice"] = {"type": "tool", "name": schema["name"]}
+        
+        return payload
+    
+    @staticmethod
+    def _chat_text(result: Dict[str, Any]) -> str:
+        """Reply text of a chat completions response."""
+        return result["choices"][0]["message"]["content"]
+    
+    @staticmethod
+    def _anthropic_text(result: Dict[str, Any]) -> str:
+        """Reply text of an Anthropic response (the tool input as JSON for tool calls)."""
+        for block in result["content"]:
+            if block.get("type") == "tool_use":
+                return fast_json.dumps(block["input"])
+        return result["content"][0]["text"]
     
     def generate_json(self, 
                       prompt: str, 
                       system_prompt: Optional[str] = None,
-                      temperature: float = 0.1) -> Dict[str, Any]:
-        """Generate JSON response."""
+                      temperature: float = 0.1,
+                      response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Generate JSON response (schema-constrained on OpenAI and Anthropic when response_format is given)."""
         
-        if self.provider in ["anthropic", "perplexity"]:
+        if self.provider == "anthropic" and response_format:
+            response = self.generate(
+                prompt=prompt,
+                system_prompt=system_prompt,
+                temperature=temperature,
+                response_format=response_format
+            )
+        elif self.provider in ["anthropic", "perplexity"]:
             json_prompt = f"{prompt}\n\nRespond with valid JSON only, no other text."
             response = self.generate(
                 prompt=json_prompt,
@@ -176,31 +236,61 @@ class LLMClient:
                 prompt=prompt,
                 system_prompt=system_prompt,
                 temperature=temperature,
-                json_mode=True
+                json_mode=True,
+                response_format=response_format
             )
         
-        if "```json" in response:
-            response = response.split("```json")[1].split("```")[0].strip()
-        elif "```" in response:
-            response = response.split("```")[1].split("```")[0].strip()
+        # Clean JSON (the structured-output case) skips the fence search
+        if not response.lstrip().startswith(('{', '[')):
+            fence = _JSON_FENCE.search(response)
+            if fence:
+                response = fence.group(1)
         
-        return json.loads(response)
+        return fast_json.loads(response)
     
     def generate_json_with_trace(self,
                                  prompt: str,
                                  prompt_name: str = "unknown",
                                  input_vars: Optional[Dict[str, Any]] = None,
+                                 use_cache: bool = False,
                                  **kwargs) -> Dict[str, Any]:
-        """Generate JSON with automatic tracing."""
+        """Generate JSON with automatic tracing.
+        
+        With use_cache, responses are stored by (provider, model, prompt_name,
+        prompt) and repeated prompts are answered without an API call.
+        """
+        if use_cache:
+            cache = get_response_cache()
+            cache_key = cache.make_key(self.provider, self.model, prompt_name, prompt)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         tracer = get_tracer()
         trace_id = tracer.start_trace(prompt_name, prompt, input_vars or {})
         
         try:
             result = self.generate_json(prompt, **kwargs)
-            result_str = json.dumps(result)
-            tokens = (len(prompt) + len(result_str)) // 4
+            result_str = fast_json.dumps(result)
+            tokens = count_tokens(prompt, self.model) + count_tokens(result_str, self.model)
             tracer.end_trace(trace_id, success=True, output=result_str, tokens_used=tokens)
+            if use_cache:
+                cache.set(cache_key, result)
             return result
         except Exception as e:
             tracer.end_trace(trace_id, success=False, error=str(e))
             raise
+    
+    async def generate_json_with_trace_async(self,
+                                             prompt: str,
+                                             prompt_name: str = "unknown",
+                                             input_vars: Optional[Dict[str, Any]] = None,
+                                             **kwargs) -> Dict[str, Any]:
+        """Async variant of generate_json_with_trace (runs the HTTP call on the LLM thread pool)."""
+        return await run_in_llm_executor(
+            self.generate_json_with_trace,
+            prompt,
+            prompt_name=prompt_name,
+            input_vars=input_vars,
+            **kwargs
+        )
@@ -0,0 +1,55 @@
+"""Logging setup - agent progress lines are written by a background thread, in batches."""
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+
+
+_queue = None
+_listener = None
+
+def setup_logging(level: int = logging.INFO, capacity: int = 16):
+    """Send log records to stderr from a background thread.
+    
+    Logging calls only enqueue the record; a QueueListener thread formats
+    and writes them through a buffer of `capacity` records. Warnings and
+    errors flush the buffer immediately. Safe to call more than once
+    (Streamlit re-runs the app script on every interaction).
+    """
+    global _queue, _listener
+    if _listener is not None:
+        return
+    
+    # Emoji that the console encoding can't represent are escaped, not raised
+    if hasattr(sys.stderr, 'reconfigure'):
+        sys.stderr.reconfigure(errors='backslashreplace')
+    
+    target = logging.StreamHandler(sys.stderr)
+    target.setFormatter(logging.Formatter("%(message)s"))
+    buffer = MemoryHandler(capacity, flushLevel=logging.WARNING, target=target)
+    
+    _queue = queue.Queue()
+    _listener = QueueListener(_queue, buffer)
+    _listener.start()
+    atexit.register(_shutdown)
+    
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(QueueHandler(_queue))
+
+
+def flush_logs():
+    """Write out all queued and buffered records (call at the end of a batch of work)."""
+    if _queue is not None:
+        _queue.join()  # The listener marks each record done once handled
+        for handler in _listener.handlers:
+            handler.flush()
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+
+
+def _shutdown():
+    """Drain the queue and stop the listener thread at interpreter exit."""
+    _listener.stop()
+    flush_logs()
@@ -1,5 +1,6 @@
 """Data models for company discovery."""
-from typing import List, 
+import copy
+from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, HttpUrl, Field
 
 
@@ -15,7 +16,7 @@ class CompanyResult(BaseModel):
         description="2-3 sentence explanation for selection"
     )
     fit_score: int = Field(
-        ge=0, le=100, 
+        ge=0, le=100,
         description="Fit score from 0-100"
     )
     category: str = Field(
@@ -28,3 +29,98 @@ class SearchQuery(BaseModel):
     query_type: str
     additional_criteria: str = ""
     max_results: int = 10
+
+
+class CompanyExtractBase(BaseModel):
+    """LLM output of ENRICHMENT_EXTRACT_COMPANY_BASE."""
+    company_name: Optional[str] = Field(description="Official company name, or null if not a company")
+    website_url: Optional[str] = Field(description="The company's own website, not a profile site")
+    locations: List[str] = Field(description="City/state/country names only")
+    size_indicators: List[str] = Field(description="Size clues such as employee count or revenue")
+    business_description: Optional[str] = Field(description="One sentence on what they do")
+
+
+class CompanyExtract(CompanyExtractBase):
+    """LLM output of ENRICHMENT_EXTRACT_COMPANY_INFO."""
+    criteria_match: bool = Field(description="Whether the company matches the additional criteria")
+    match_reason: Optional[str] = Field(description="Why it matches or doesn't match the criteria")
+
+
+class CriteriaCheck(BaseModel):
+    """LLM output of ENRICHMENT_CHECK_CRITERIA."""
+    criteria_match: bool = Field(description="Whether the company matches the criteria")
+    match_reason: str = Field(description="Why it matches or doesn't match the criteria")
+
+
+class CompanyScore(BaseModel):
+    """LLM output of SCORING_EVALUATE_COMPANY."""
+    fit_score: int = Field(ge=0, le=100, description="Fit score from 0-100")
+    estimated_size: Literal["Small", "Medium", "Large"]
+    rationale: str = Field(description="2-3 sentences explaining the score")
+
+
+class IndexedCompanyScore(CompanyScore):
+    """One entry of SCORING_EVALUATE_COMPANIES_BATCH output."""
+    index: int = Field(description="The company's number from the prompt list")
+
+
+class CompanyScoreBatch(BaseModel):
+    """LLM output of SCORING_EVALUATE_COMPANIES_BATCH."""
+    scores: List[IndexedCompanyScore]
+
+
+class CompanyExtractAndScore(CompanyExtract, CompanyScore):
+    """LLM output of EXTRACT_AND_SCORE_COMPANY."""
+
+
+# Keywords OpenAI strict structured outputs do not accept
+_UNSUPPORTED_KEYWORDS = {'title', 'default', 'minimum', 'maximum', 'exclusiveMinimum', 'exclusiveMaximum'}
+
+
+def _strict_schema(node: Dict[str, Any], definitions: Dict[str, Any]) -> Dict[str, Any]:
+    """Inline $refs and mark every object closed with all fields required."""
+    if '$ref' in node:
+        node = {**definitions[node['$ref'].split('/')[-1]], **{k: v for k, v in node.items() if k != '$ref'}}
+    if len(node.get('allOf', [])) == 1:
+        node = {**_strict_schema(node['allOf'][0], definitions), **{k: v for k, v in node.items() if k != 'allOf'}}
+
+    node = {k: v for k, v in node.items() if k not in _UNSUPPORTED_KEYWORDS}
+
+    if node.get('type') == 'object':
+        required = set(node.get('required', []))
+        properties = {}
+        for name, prop in node.get('properties', {}).items():
+            prop = _strict_schema(prop, definitions)
+            # Optional fields stay present but may be null
+            if name not in required:
+                prop = {'anyOf': [prop, {'type': 'null'}]}
+            properties[name] = prop
+        node['properties'] = properties
+        node['required'] = list(properties)
+        node['additionalProperties'] = False
+    elif node.get('type') == 'array' and 'items' in node:
+        node['items'] = _strict_schema(node['items'], definitions)
+    return node
+
+
+def json_schema_format(model: type) -> Dict[str, Any]:
+    """OpenAI `response_format` payload for structured output matching `model`."""
+    schema = copy.deepcopy(model.schema())
+    definitions = schema.pop('definitions', {})
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": model.__name__,
+            "schema": _strict_schema(schema, definitions),
+            "strict": True
+        }
+    }
+
+
+# Response formats, built once at import
+COMPANY_EXTRACT_BASE_FORMAT = json_schema_format(CompanyExtractBase)
+COMPANY_EXTRACT_FORMAT = json_schema_format(CompanyExtract)
+CRITERIA_CHECK_FORMAT = json_schema_format(CriteriaCheck)
+COMPANY_SCORE_FORMAT = json_schema_format(CompanyScore)
+COMPANY_SCORE_BATCH_FORMAT = json_schema_format(CompanyScoreBatch)
+COMPANY_EXTRACT_AND_SCORE_FORMAT = json_schema_format(CompanyExtractAndScore)
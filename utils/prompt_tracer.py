@@ -1,18 +1,62 @@
 """Prompt tracing utility for logging and analyzing prompt performance."""
-import json
+import atexit
+import itertools
+import threading
 import time
-from typing import Dict, Any, Optional
+import uuid
+from typing import Dict, Any, List, Optional
+from collections import deque
 from datetime import datetime
 import os
+from . import fast_json
+
+
+_MAX_TRACES = 1000  # Traces kept when the log is compacted
+_TAIL_BLOCK_SIZE = 8192  # Bytes read per step when reading the log backwards
+_FLUSH_INTERVAL = 2.0  # Seconds between background writes of finished traces
+_FLUSH_BATCH = 50  # Buffered traces that trigger an early write
+_trace_counter = itertools.count()  # Unique trace ids, even for concurrent same-prompt traces
+_RUN_ID = uuid.uuid4().hex[:8]  # Per-process prefix, so ids stay unique across runs in the log
+
+
+def _tail_lines(path: str, limit: int) -> List[bytes]:
+    """Last `limit` lines of a file, read backwards in blocks."""
+    if limit <= 0:
+        return []
+    
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        blocks = []
+        newlines = 0
+        # One more newline than lines wanted: the file ends with one
+        while pos > 0 and newlines <= limit:
+            step = min(_TAIL_BLOCK_SIZE, pos)
+            pos -= step
+            f.seek(pos)
+            block = f.read(step)
+            blocks.append(block)
+            newlines += block.count(b'\n')
+    
+    lines = b''.join(reversed(blocks)).splitlines()
+    if pos > 0:
+        lines = lines[1:]  # Starts mid-line
+    return lines[-limit:]
 
 
 class PromptTracer:
     """Traces prompt executions for performance monitoring."""
     
-    def __init__(self, log_file: str = "logs/prompt_traces.json"):
-        """Initialize tracer."""
+    def __init__(self, log_file: str = "logs/prompt_traces.jsonl"):
+        """Initialize tracer (the log holds one JSON trace per line)."""
         self.log_file = log_file
-        self.current_traces = []
+        self.current_traces: Dict[str, Dict] = {}  # In-flight traces by trace_id
+        self._lock = threading.Lock()
+        self._appended = 0  # Traces appended by this tracer
+        self._buffer = deque()  # Finished traces not yet written
+        self._flush_lock = threading.Lock()  # Serializes writes to the log file
+        self._flush_event = threading.Event()
+        self._writer = None
+        atexit.register(self.flush)
         self._ensure_log_dir()
     
     def _ensure_log_dir(self):
@@ -24,7 +68,7 @@ class PromptTracer:
     def start_trace(self, prompt_name: str, prompt_text: str, 
                    input_vars: Dict[str, Any]) -> str:
         """Start tracing a prompt execution."""
-        trace_id = f"{prompt_name}_{int(time.time() * 1000)}"
+        trace_id = f"{prompt_name}_{_RUN_ID}_{next(_trace_counter)}"
         
         trace = {
             "trace_id": trace_id,
@@ -35,7 +79,8 @@ class PromptTracer:
             "start_time": time.time()
         }
         
-        self.current_traces.append(trace)
+        with self._lock:
+            self.current_traces[trace_id] = trace
         return trace_id
     
     def end_trace(self, trace_id: str, success: bool, 
@@ -43,7 +88,8 @@ class PromptTracer:
                  tokens_used: Optional[int] = None,
                  error: Optional[str] = None):
         """End tracing and log results."""
-        trace = next((t for t in self.current_traces if t["trace_id"] == trace_id), None)
+        with self._lock:
+            trace = self.current_traces.pop(trace_id, None)
         if not trace:
             return
         
@@ -59,43 +105,74 @@ class PromptTracer:
         if tokens_used:
             trace["estimated_cost"] = round(tokens_used * 0.000002, 6)
         
-        # Save to file
-        self._save_trace(trace)
-        
-        # Remove from current traces
-        self.current_traces = [t for t in self.current_traces if t["trace_id"] != trace_id]
+        with self._lock:
+            # Save to file
+            self._save_trace(trace)
     
     def _save_trace(self, trace: Dict):
-        """Append trace to log file."""
-        try:
-            # Read existing traces
-            traces = []
-            if os.path.exists(self.log_file):
-                with open(self.log_file, 'r') as f:
-                    try:
-                        traces = json.load(f)
-                    except:
-                        traces = []
-            
-            # Append new trace
-            traces.append(trace)
-            
-            # Keep only last 1000 traces
-            traces = traces[-1000:]
+        """Queue a trace for the background writer (called with self._lock held).
+        
+        Keeps file I/O off the LLM call path; buffered traces are written
+        every _FLUSH_INTERVAL seconds, sooner once _FLUSH_BATCH pile up.
+        """
+        self._buffer.append(trace)
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="prompt-tracer", daemon=True)
+            self._writer.start()
+        if len(self._buffer) >= _FLUSH_BATCH:
+            self._flush_event.set()
+    
+    def _write_loop(self):
+        """Background writer: flush buffered traces periodically."""
+        while True:
+            self._flush_event.wait(_FLUSH_INTERVAL)
+            self._flush_event.clear()
+            self.flush()
+    
+    def flush(self):
+        """Append buffered traces to the log file.
+        
+        The log is compacted to the last _MAX_TRACES traces on this tracer's
+        first write and then every _MAX_TRACES traces, so it stays bounded
+        without rewriting it per trace.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._buffer:
+                    return
+                pending, self._buffer = self._buffer, deque()
             
-            # Write back
-            with open(self.log_file, 'w') as f:
-                json.dump(traces, f, indent=2)
-        except Exception as e:
-            print(f"Warning: Could not save trace: {e}")
+            try:
+                with open(self.log_file, 'a', encoding='utf-8') as f:
+                    f.writelines(fast_json.dumps(trace) + '\n' for trace in pending)
+                
+                previous = self._appended
+                self._appended += len(pending)
+                if previous == 0 or previous // _MAX_TRACES != self._appended // _MAX_TRACES:
+                    self._compact()
+            except Exception as e:
+                print(f"Warning: Could not save traces: {e}")
+    
+    def _compact(self):
+        """Rewrite the log with only its last _MAX_TRACES traces."""
+        lines = _tail_lines(self.log_file, _MAX_TRACES)
+        tmp_file = self.log_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.writelines(line + b'\n' for line in lines)
+        os.replace(tmp_file, self.log_file)
     
     def get_recent_traces(self, limit: int = 50) -> list:
-        """Get recent traces."""
+        """Get recent traces (oldest first)."""
+        self.flush()
         try:
             if os.path.exists(self.log_file):
-                with open(self.log_file, 'r') as f:
-                    traces = json.load(f)
-                    return traces[-limit:]
+                traces = []
+                for line in _tail_lines(self.log_file, limit):
+                    try:
+                        traces.append(fast_json.loads(line))
+                    except ValueError:
+                        pass  # Torn write
+                return traces
             return []
         except:
             return []
@@ -113,45 +190,47 @@ class PromptTracer:
                 "total_cost": 0
             }
         
-        successful = [t for t in traces if t.get("success")]
-        
-        return {
-            "total_traces": len(traces),
-            "success_rate": round(len(successful) / len(traces) * 100, 1),
-            "avg_latency": round(sum(t.get("latency_seconds", 0) for t in traces) / len(traces), 2),
-            "total_tokens": sum(t.get("tokens_used", 0) for t in traces),
-            "total_cost": round(sum(t.get("estimated_cost", 0) for t in traces), 4),
-            "by_prompt": self._stats_by_prompt(traces)
-        }
-    
-    def _stats_by_prompt(self, traces: list) -> Dict[str, Dict]:
-        """Get stats grouped by prompt name."""
+        # One pass: per-prompt sums, from which the totals are added up
         by_prompt = {}
+        total_cost = 0
         
         for trace in traces:
             name = trace.get("prompt_name", "unknown")
-            if name not in by_prompt:
-                by_prompt[name] = {
+            stats = by_prompt.get(name)
+            if stats is None:
+                stats = by_prompt[name] = {
                     "count": 0,
                     "success": 0,
                     "total_latency": 0,
                     "total_tokens": 0
                 }
             
-            by_prompt[name]["count"] += 1
+            stats["count"] += 1
             if trace.get("success"):
-                by_prompt[name]["success"] += 1
-            by_prompt[name]["total_latency"] += trace.get("latency_seconds", 0)
-            by_prompt[name]["total_tokens"] += trace.get("tokens_used", 0)
+                stats["success"] += 1
+            stats["total_latency"] += trace.get("latency_seconds", 0)
+            stats["total_tokens"] += trace.get("tokens_used", 0)
+            total_cost += trace.get("estimated_cost", 0)
+        
+        total = len(traces)
+        successful = sum(stats["success"] for stats in by_prompt.values())
+        total_latency = sum(stats["total_latency"] for stats in by_prompt.values())
         
         # Calculate averages
-        for name, stats in by_prompt.items():
+        for stats in by_prompt.values():
             count = stats["count"]
             stats["success_rate"] = round(stats["success"] / count * 100, 1)
             stats["avg_latency"] = round(stats["total_latency"] / count, 2)
             stats["avg_tokens"] = round(stats["total_tokens"] / count, 0)
         
-        return by_prompt
+        return {
+            "total_traces": total,
+            "success_rate": round(successful / total * 100, 1),
+            "avg_latency": round(total_latency / total, 2),
+            "total_tokens": sum(stats["total_tokens"] for stats in by_prompt.values()),
+            "total_cost": round(total_cost, 4),
+            "by_prompt": by_prompt
+        }
 
 
 # Global tracer instance
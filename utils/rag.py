@@ -1,8 +1,23 @@
 """RAG (Retrieval Augmented Generation) utilities."""
-from typing import Optional, List, Dict, Any
+import logging
+import os
+from typing import Optional, List, Dict, Any, Tuple
+from . import fast_json
 from .vector_store import VectorStore
 from .llm_client import LLMClient
-from prompts.prompts import RAG_QUERY_WITH_CONTEXT, RAG_GENERATE_SEARCH_QUERIES
+from prompts.prompts import render_prompt
+
+
+# Retrieval queries whose top chunks make up the company profile
+_PROFILE_QUERIES = (
+    "company overview and product",
+    "target customers and market",
+    "key features and capabilities"
+)
+_PROFILE_CACHE_FILE = "company_profile.json"  # Kept in the vector store directory
+
+
+logger = logging.getLogger(__name__)
 
 
 class RAGSystem:
@@ -12,6 +27,8 @@ class RAGSystem:
         """Initialize RAG system."""
         self.vector_store = vector_store
         self.llm = llm_client
+        self._company_profile: Optional[str] = None
+        self._search_queries: Dict[Tuple[str, str], List[str]] = {}
     
     def query_with_context(self, 
                           query: str, 
@@ -29,22 +46,47 @@ class RAGSystem:
             context = "\n\n".join(context_results)
         
         # Build prompt with context using centralized template
-        prompt = RAG_QUERY_WITH_CONTEXT.format(context=context, query=query)
+        prompt = render_prompt("RAG_QUERY_WITH_CONTEXT", context=context, query=query)
         
         return self.llm.generate(prompt, system_prompt=system_prompt)
     
     def get_company_profile(self) -> str:
-        """Get comprehensive company profile."""
-        queries = [
-            "company overview and product",
-            "target customers and market",
-            "key features and capabilities"
-        ]
+        """Get comprehensive company profile (retrieved once per RAG system).
         
+        The profile is also saved next to the vector store, keyed by the
+        indexed documents, so later runs skip retrieval (and loading the
+        embedding model) until the documents are re-indexed.
+        """
+        if self._company_profile is None:
+            self._company_profile = self._load_company_profile()
+        return self._company_profile
+    
+    def _load_company_profile(self) -> str:
+        """Read the saved profile if it matches the index, else retrieve and save it."""
+        path = os.path.join(self.vector_store.persist_directory, _PROFILE_CACHE_FILE)
+        version = fast_json.dumps([self.vector_store.content_version(), _PROFILE_QUERIES])
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = fast_json.loads(f.read())
+            if saved['version'] == version:
+                return saved['profile']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass  # Missing, stale or unreadable: rebuild below
+        
+        profile = self._retrieve_company_profile()
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(fast_json.dumps({'version': version, 'profile': profile}))
+        except OSError as e:
+            logger.warning(f"Could not save company profile: {e}")
+        return profile
+    
+    def _retrieve_company_profile(self) -> str:
+        """Retrieve the company profile chunks from the vector store."""
         all_context = []
-        for q in queries:
-            results = self.vector_store.query(q, n_results=3)
-            
+        # One embedding call and one collection query for all three
+        for results in self.vector_store.query_many(list(_PROFILE_QUERIES), n_results=3):
             # Handle both formats
             if results and isinstance(results[0], dict):
                 all_context.extend([r['document'] for r in results])
@@ -56,12 +98,24 @@ class RAGSystem:
         return "\n\n".join(unique_context[:10])  # Top 10 chunks
     
     def generate_search_queries(self, query_type: str, additional_criteria: str = "") -> List[str]:
-        """Generate search queries for customer/partner discovery."""
+        """Generate search queries for customer/partner discovery.
         
+        Responses are cached on disk, so repeating a discovery with the same
+        type and criteria (against the same profile) reuses its queries;
+        within this RAG system they are also kept in memory.
+        """
+        key = (query_type, additional_criteria)
+        if key not in self._search_queries:
+            self._search_queries[key] = self._generate_search_queries(query_type, additional_criteria)
+        return list(self._search_queries[key])
+    
+    def _generate_search_queries(self, query_type: str, additional_criteria: str) -> List[str]:
+        """Ask the LLM for search queries based on the company profile."""
         company_context = self.get_company_profile()
         
         # Use centralized prompt template
-        prompt = RAG_GENERATE_SEARCH_QUERIES.format(
+        prompt = render_prompt(
+            "RAG_GENERATE_SEARCH_QUERIES",
             company_context=company_context,
             query_type=query_type,
             additional_criteria=additional_criteria or "None"
@@ -70,7 +124,8 @@ class RAGSystem:
         response = self.llm.generate_json_with_trace(
             prompt,
             prompt_name="RAG_GENERATE_SEARCH_QUERIES",
-            input_vars={"query_type": query_type, "additional_criteria": additional_criteria}
+            input_vars={"query_type": query_type, "additional_criteria": additional_criteria},
+            use_cache=True
         )
         return response.get("queries", [])
 
@@ -0,0 +1,64 @@
+"""Persistent cache for parsed LLM JSON responses."""
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+from . import fast_json
+
+
+class ResponseCache:
+    """SQLite-backed cache of LLM responses keyed by a prompt hash."""
+
+    def __init__(self, db_path: str = "data/llm_cache.sqlite3"):
+        """Open (or create) the cache database."""
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Hash the prompt (plus model/template identifiers) into a cache key."""
+        return hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return fast_json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Store a response."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value) VALUES (?, ?)",
+                (key, fast_json.dumps(value))
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """Drop all cached responses."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+# Global cache instance
+_cache = None
+
+def get_response_cache() -> ResponseCache:
+    """Get global response cache instance."""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,43 @@
+"""Retry policy for transient API failures (rate limits, 5xx, timeouts)."""
+from typing import Optional
+import requests
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRY_AFTER_SECONDS = 60
+
+_backoff = wait_exponential_jitter(initial=1, max=30)
+
+
+def _response(exc: BaseException) -> Optional[requests.Response]:
+    """HTTP response attached to an exception, if any."""
+    return getattr(exc, 'response', None)
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Whether a failed call is worth retrying."""
+    if isinstance(exc, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    response = _response(exc)
+    return response is not None and response.status_code in RETRYABLE_STATUS_CODES
+
+
+def wait_retry_after(retry_state) -> float:
+    """Honor the server's Retry-After header, else jittered exponential backoff."""
+    response = _response(retry_state.outcome.exception())
+    if response is not None:
+        try:
+            return min(float(response.headers.get('retry-after')), MAX_RETRY_AFTER_SECONDS)
+        except (TypeError, ValueError):
+            pass
+    return _backoff(retry_state)
+
+
+# Decorator for functions that call external APIs
+retry_transient = retry(
+    retry=retry_if_exception(is_transient_error),
+    wait=wait_retry_after,
+    stop=stop_after_attempt(5),
+    reraise=True
+)
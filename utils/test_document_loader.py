@@ -0,0 +1,113 @@
+"""Tests for document loading and incremental indexing."""
+import os
+from zipfile import ZipFile
+
+import pytest
+
+from utils import document_loader
+from utils.document_loader import extract_docx_text, index_documents
+
+
+_DOCUMENT_XML = (
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    '<w:body>{}</w:body></w:document>'
+)
+
+
+def _write_docx(path, *paragraphs):
+    body = ''.join(f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>' for text in paragraphs)
+    with ZipFile(path, 'w') as docx:
+        docx.writestr('word/document.xml', _DOCUMENT_XML.format(body))
+
+
+class FakeVectorStore:
+    """In-memory stand-in for the VectorStore methods index_documents uses."""
+
+    def __init__(self):
+        self.chunks = {}  # id -> (text, metadata)
+        self.known_embeddings = None
+
+    def source_fingerprints(self):
+        return {metadata['source']: metadata['fingerprint'] for _, metadata in self.chunks.values()}
+
+    def source_embeddings(self, sources):
+        return {text: [float(len(text))] for text, metadata in self.chunks.values() if metadata['source'] in sources}
+
+    def delete_source(self, source):
+        self.chunks = {i: chunk for i, chunk in self.chunks.items() if chunk[1]['source'] != source}
+
+    def chunk_text(self, text, chunk_size=500, overlap=50):
+        return [text]
+
+    def add_documents(self, documents, metadatas, ids, known_embeddings=None):
+        self.known_embeddings = known_embeddings
+        for text, metadata, chunk_id in zip(documents, metadatas, ids):
+            assert chunk_id not in self.chunks
+            self.chunks[chunk_id] = (text, metadata)
+
+
+@pytest.fixture(params=['lxml', 'ElementTree'])
+def xml_parser(request, monkeypatch):
+    if request.param == 'ElementTree':
+        monkeypatch.setattr(document_loader, 'lxml_etree', None)
+    elif document_loader.lxml_etree is None:
+        pytest.skip('lxml not installed')
+
+
+def test_extract_docx_text_joins_paragraphs(tmp_path, xml_parser):
+    _write_docx(tmp_path / 'a.docx', 'First', '', 'Second')
+    assert extract_docx_text(tmp_path / 'a.docx') == 'First\nSecond'
+
+
+def test_extract_docx_text_reads_nested_paragraphs_in_order(tmp_path, xml_parser):
+    nested = (
+        '<w:p><w:r><w:t>Outer</w:t></w:r>'
+        '<w:r><w:txbxContent><w:p><w:r><w:t>Inner</w:t></w:r></w:p></w:txbxContent></w:r></w:p>'
+        '<w:p><w:r><w:t>After</w:t></w:r></w:p>'
+    )
+    with ZipFile(tmp_path / 'b.docx', 'w') as docx:
+        docx.writestr('word/document.xml', _DOCUMENT_XML.format(nested))
+    # Same output as the old whole-tree findall('.//w:p')
+    assert extract_docx_text(tmp_path / 'b.docx') == 'OuterInner\nInner\nAfter'
+
+
+def test_index_documents_only_reindexes_changed_files(tmp_path):
+    _write_docx(tmp_path / 'a.docx', 'Alpha')
+    _write_docx(tmp_path / 'b.docx', 'Beta')
+    _write_docx(tmp_path / 'c.docx', 'Gamma')
+    store = FakeVectorStore()
+
+    indexed = index_documents(store, tmp_path)
+    assert sorted(doc['filename'] for doc in indexed) == ['a.docx', 'b.docx', 'c.docx']
+    assert store.chunks['a.docx#0'] == ('Alpha', {
+        'source': 'a.docx', 'type': 'docx', 'fingerprint': document_loader._fingerprint(tmp_path / 'a.docx')
+    })
+
+    # Nothing changed: nothing is extracted or re-added
+    assert index_documents(store, tmp_path) == []
+    assert len(store.chunks) == 3
+
+    # One file edited, one deleted
+    _write_docx(tmp_path / 'b.docx', 'Beta', 'More beta')
+    os.utime(tmp_path / 'b.docx', ns=(1, 1))
+    os.remove(tmp_path / 'c.docx')
+
+    indexed = index_documents(store, tmp_path)
+    assert [doc['filename'] for doc in indexed] == ['b.docx']
+    assert sorted(store.chunks) == ['a.docx#0', 'b.docx#0']
+    assert store.chunks['b.docx#0'][0] == 'Beta\nMore beta'
+
+
+def test_index_documents_offers_stale_embeddings_for_reuse(tmp_path):
+    _write_docx(tmp_path / 'a.docx', 'Alpha')
+    _write_docx(tmp_path / 'b.docx', 'Beta')
+    store = FakeVectorStore()
+    index_documents(store, tmp_path)
+    assert store.known_embeddings == {}
+
+    os.utime(tmp_path / 'a.docx', ns=(1, 1))  # Touched, text unchanged
+    os.remove(tmp_path / 'b.docx')
+    index_documents(store, tmp_path)
+    # Only the changed and deleted sources' chunks are looked up
+    assert store.known_embeddings == {'Alpha': [5.0], 'Beta': [4.0]}
+    assert sorted(store.chunks) == ['a.docx#0']
@@ -0,0 +1,76 @@
+"""Tests for the PromptTracer."""
+import json
+import time
+
+from utils import prompt_tracer
+from utils.prompt_tracer import PromptTracer, _tail_lines
+
+
+def _trace(tracer, name='EXTRACT'):
+    tracer.end_trace(tracer.start_trace(name, 'prompt', {}), success=True, output='{}', tokens_used=10)
+
+
+def test_trace_ids_are_unique_and_carry_a_run_prefix(tmp_path):
+    tracer = PromptTracer(log_file=str(tmp_path / 'traces.jsonl'))
+    first = tracer.start_trace('EXTRACT', 'prompt', {})
+    second = tracer.start_trace('EXTRACT', 'prompt', {})
+    assert first != second
+    assert first.startswith(f'EXTRACT_{prompt_tracer._RUN_ID}_')
+
+
+def test_tail_lines_reads_across_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(prompt_tracer, '_TAIL_BLOCK_SIZE', 7)
+    path = tmp_path / 'log.jsonl'
+    path.write_bytes(b''.join(b'line %d\n' % i for i in range(10)))
+    assert _tail_lines(str(path), 3) == [b'line 7', b'line 8', b'line 9']
+    assert _tail_lines(str(path), 20) == [b'line %d' % i for i in range(10)]
+    assert _tail_lines(str(path), 0) == []
+
+
+def test_flush_appends_jsonl_and_compacts_to_max_traces(tmp_path, monkeypatch):
+    monkeypatch.setattr(prompt_tracer, '_MAX_TRACES', 5)
+    log_file = tmp_path / 'traces.jsonl'
+    log_file.write_text(''.join(json.dumps({'trace_id': f'old_{i}'}) + '\n' for i in range(8)))
+    tracer = PromptTracer(log_file=str(log_file))
+
+    # The first write compacts the log left by earlier runs
+    _trace(tracer)
+    tracer.flush()
+    ids = [json.loads(line)['trace_id'] for line in log_file.read_text().splitlines()]
+    assert ids[:4] == ['old_4', 'old_5', 'old_6', 'old_7'] and len(ids) == 5
+
+    # Then only every _MAX_TRACES appended traces
+    for _ in range(3):
+        _trace(tracer)
+    tracer.flush()
+    assert len(log_file.read_text().splitlines()) == 8
+    _trace(tracer)
+    tracer.flush()
+    assert len(log_file.read_text().splitlines()) == 5
+
+
+def test_get_recent_traces_skips_torn_lines(tmp_path):
+    log_file = tmp_path / 'traces.jsonl'
+    log_file.write_text('{"trace_id": "a"}\n{"trace_id": \n{"trace_id": "b"}\n')
+    tracer = PromptTracer(log_file=str(log_file))
+    assert [t['trace_id'] for t in tracer.get_recent_traces()] == ['a', 'b']
+
+
+def test_end_trace_buffers_until_the_writer_flushes(tmp_path, monkeypatch):
+    monkeypatch.setattr(prompt_tracer, '_FLUSH_BATCH', 3)
+    monkeypatch.setattr(prompt_tracer, '_FLUSH_INTERVAL', 60)
+    log_file = tmp_path / 'traces.jsonl'
+    tracer = PromptTracer(log_file=str(log_file))
+
+    # Finished traces are queued, not written on the caller's thread
+    _trace(tracer)
+    _trace(tracer)
+    assert not log_file.exists()
+    assert tracer._writer is not None and tracer._writer.daemon
+
+    # A full batch wakes the background writer early
+    _trace(tracer)
+    deadline = time.monotonic() + 5
+    while not log_file.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(tracer.get_recent_traces()) == 3
@@ -0,0 +1,55 @@
+"""Tests for the LLM response cache."""
+import pytest
+
+from utils import llm_client
+from utils.llm_client import LLMClient
+from utils.prompt_tracer import PromptTracer
+from utils.response_cache import ResponseCache
+
+
+def test_response_cache_round_trip_and_persistence(tmp_path):
+    db_path = str(tmp_path / 'cache' / 'llm.sqlite3')
+    cache = ResponseCache(db_path)
+    key = cache.make_key('openai', 'gpt-4o-mini', 'EXTRACT', 'prompt')
+    assert cache.get(key) is None
+
+    cache.set(key, {'company_name': 'Acme', 'locations': ['Austin, TX']})
+    assert ResponseCache(db_path).get(key) == {'company_name': 'Acme', 'locations': ['Austin, TX']}
+
+    cache.clear()
+    assert cache.get(key) is None
+
+
+def test_make_key_separates_parts():
+    assert ResponseCache.make_key('a', 'bc') != ResponseCache.make_key('ab', 'c')
+    assert ResponseCache.make_key('openai', 'm', 'P', 'x') != ResponseCache.make_key('anthropic', 'm', 'P', 'x')
+
+
+def test_generate_json_with_trace_answers_repeats_from_cache(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / 'llm.sqlite3'))
+    monkeypatch.setattr(llm_client, 'get_response_cache', lambda: cache)
+    monkeypatch.setattr(llm_client, 'get_tracer', lambda: PromptTracer(str(tmp_path / 'traces.jsonl')))
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+
+    client = LLMClient('openai')
+    calls = []
+
+    def generate_json(prompt, **kwargs):
+        calls.append(prompt)
+        if prompt == 'fails':
+            raise RuntimeError('API down')
+        return {'answer': prompt}
+
+    client.generate_json = generate_json
+
+    assert client.generate_json_with_trace('p1', prompt_name='P', use_cache=True) == {'answer': 'p1'}
+    assert client.generate_json_with_trace('p1', prompt_name='P', use_cache=True) == {'answer': 'p1'}
+    assert client.generate_json_with_trace('p1', prompt_name='Other', use_cache=True) == {'answer': 'p1'}
+    assert client.generate_json_with_trace('p1', prompt_name='P') == {'answer': 'p1'}
+    assert calls == ['p1', 'p1', 'p1']
+
+    # Failures are not cached
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            client.generate_json_with_trace('fails', prompt_name='P', use_cache=True)
+    assert calls.count('fails') == 2
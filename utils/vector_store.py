@@ -1,7 +1,27 @@
 """Vector store using ChromaDB with semantic embeddings."""
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
+import hashlib
 import chromadb
-from sentence_transformers import SentenceTransformer
+from . import fast_json
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+
+_QUERY_CACHE_SIZE = 256  # Query embeddings (and query results) kept per store
+_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
+
+@lru_cache(maxsize=None)
+def _load_embedding_model(name: str) -> 'SentenceTransformer':
+    """Load a sentence embedding model once per process, shared by all stores.
+    
+    Importing sentence_transformers pulls in torch, which takes seconds, so
+    it only happens when something is first embedded.
+    """
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name)
 
 
 class VectorStore:
@@ -10,8 +30,11 @@ class VectorStore:
     def __init__(self, collection_name: str = "axlewave_docs", persist_directory: str = "./data/vector_store"):
         """Initialize ChromaDB with sentence transformers."""
         self.client = chromadb.PersistentClient(path=persist_directory)
+        self.persist_directory = persist_directory
         self.collection_name = collection_name
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self._embedding_model = None
+        self._query_embeddings: Dict[str, List[float]] = {}
+        self._query_results: Dict[Tuple[str, int], Tuple[str, ...]] = {}  # Cleared on any change
         
         try:
             self.collection = self.client.get_collection(name=collection_name)
@@ -24,12 +47,61 @@ class VectorStore:
             )
             print("Created new ChromaDB collection")
     
+    @property
+    def embedding_model(self) -> 'SentenceTransformer':
+        """Sentence embedding model, loaded on first use.
+        
+        Runs that never embed (saved profile, up-to-date index) never load it.
+        """
+        if self._embedding_model is None:
+            self._embedding_model = _load_embedding_model(_EMBEDDING_MODEL)
+        return self._embedding_model
+    
     def is_populated(self) -> bool:
         """Check if collection has documents."""
         return self.collection.count() > 0
     
-    def add_documents(self, documents: List[str], metadatas: Optional[List[Dict[str, Any]]] = None, ids: Optional[List[str]] = None):
-        """Add documents with semantic embeddings."""
+    def source_fingerprints(self) -> Dict[str, str]:
+        """Fingerprint each indexed source file was indexed with ('' if none recorded)."""
+        metadatas = self.collection.get(include=['metadatas'])['metadatas'] or []
+        return {
+            metadata['source']: metadata.get('fingerprint', '')
+            for metadata in metadatas
+            if metadata and 'source' in metadata
+        }
+    
+    def content_version(self) -> str:
+        """Hash of the indexed sources and fingerprints; changes on every re-index."""
+        fingerprints = sorted(self.source_fingerprints().items())
+        return hashlib.blake2b(fast_json.dumps(fingerprints).encode('utf-8'), digest_size=16).hexdigest()
+    
+    def source_embeddings(self, sources: List[str]) -> Dict[str, List[float]]:
+        """Stored embedding of each chunk text of the given source files."""
+        embeddings = {}
+        for source in sources:
+            chunks = self.collection.get(where={"source": source}, include=['documents', 'embeddings'])
+            embeddings.update(zip(chunks['documents'], chunks['embeddings']))
+        return embeddings
+    
+    def delete_source(self, source: str):
+        """Remove every chunk of one source file."""
+        self.collection.delete(where={"source": source})
+        self._query_results.clear()
+    
+    def add_documents(self,
+                      documents: List[str],
+                      metadatas: Optional[List[Dict[str, Any]]] = None,
+                      ids: Optional[List[str]] = None,
+                      batch_size: int = 256,
+                      encode_batch_size: int = 64,
+                      known_embeddings: Optional[Dict[str, List[float]]] = None):
+        """Add documents with semantic embeddings.
+        
+        Documents found in known_embeddings (text -> embedding) are not
+        re-embedded; the rest are embedded in one encode call (the model
+        length-sorts them into encode_batch_size batches, which minimizes
+        padding), each distinct text once. Inserts go batch_size at a time.
+        """
         if not documents:
             return
         
@@ -39,32 +111,61 @@ class VectorStore:
         if metadatas is None:
             metadatas = [{"source": "axlewave"} for _ in documents]
         
-        embeddings = self.embedding_model.encode(documents, show_progress_bar=False).tolist()
+        known_embeddings = dict(known_embeddings or {})
+        new = list(dict.fromkeys(doc for doc in documents if doc not in known_embeddings))
+        if new:
+            encoded = self.embedding_model.encode(
+                new, batch_size=encode_batch_size, show_progress_bar=False
+            ).tolist()
+            known_embeddings.update(zip(new, encoded))
+        embeddings = [known_embeddings[doc] for doc in documents]
         
-        self.collection.add(
-            documents=documents,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids
-        )
+        # Chroma rejects inserts above the client's max batch size
+        batch_size = min(batch_size, getattr(self.client, 'max_batch_size', batch_size))
+        
+        for start in range(0, len(documents), batch_size):
+            end = start + batch_size
+            self.collection.add(
+                documents=documents[start:end],
+                embeddings=embeddings[start:end],
+                metadatas=metadatas[start:end],
+                ids=ids[start:end]
+            )
+        self._query_results.clear()
     
     def query(self, query: str, n_results: int = 5) -> List[str]:
-        """Query with semantic search."""
-        query_embedding = self.embedding_model.encode([query], show_progress_bar=False).tolist()
+        """Query with semantic search (repeated queries are answered from memory)."""
+        key = (query, n_results)
+        documents = self._query_results.pop(key, None)
+        if documents is None:
+            results = self.collection.query(
+                query_embeddings=[self._embed_query(query)],
+                n_results=n_results
+            )
+            documents = tuple(results['documents'][0]) if results['documents'] else ()
+            if len(self._query_results) >= _QUERY_CACHE_SIZE:
+                # Evict the least recently used entry (dicts keep insertion order)
+                del self._query_results[next(iter(self._query_results))]
+        self._query_results[key] = documents  # (Re)inserted as most recently used
+        
+        return list(documents)
+    
+    def query_many(self, queries: List[str], n_results: int = 5) -> List[List[str]]:
+        """Query several strings with one embedding call and one collection query."""
+        if not queries:
+            return []
         
         results = self.collection.query(
-            query_embeddings=query_embedding,
+            query_embeddings=self._embed_queries(queries),
             n_results=n_results
         )
         
-        return results['documents'][0] if results['documents'] else []
+        return results['documents'] if results['documents'] else [[] for _ in queries]
     
     def search(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
         """Search with full result details."""
-        query_embedding = self.embedding_model.encode([query], show_progress_bar=False).tolist()
-        
         results = self.collection.query(
-            query_embeddings=query_embedding,
+            query_embeddings=[self._embed_query(query)],
             n_results=n_results
         )
         
@@ -80,6 +181,32 @@ class VectorStore:
         
         return formatted_results
     
+    def _embed_query(self, query: str) -> List[float]:
+        """Embed a query string, reusing the embedding of repeated queries."""
+        return self._embed_queries([query])[0]
+    
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed query strings, encoding the ones not cached in a single call."""
+        cache = self._query_embeddings
+        found = {}  # Kept aside, so evictions below can't lose this call's hits
+        missing = []
+        for query in dict.fromkeys(queries):
+            embedding = cache.pop(query, None)
+            if embedding is None:
+                missing.append(query)
+            else:
+                cache[query] = found[query] = embedding  # Reinserted as most recently used
+        
+        if missing:
+            embeddings = self.embedding_model.encode(missing, show_progress_bar=False).tolist()
+            for query, embedding in zip(missing, embeddings):
+                if len(cache) >= _QUERY_CACHE_SIZE:
+                    # Evict the least recently used entry (dicts keep insertion order)
+                    del cache[next(iter(cache))]
+                cache[query] = found[query] = embedding
+        
+        return [found[q] for q in queries]
+    
     def chunk_text(self, text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
         """Split text into overlapping chunks."""
         words = text.split()
@@ -92,13 +219,24 @@ class VectorStore:
         
         return chunks
     
-    def reset(self):
-        """Clear the collection."""
+    def reset(self, hard: bool = False):
+        """Clear the collection.
+        
+        Deletes every chunk but keeps the collection and its index settings;
+        with hard=True the collection is dropped and created anew.
+        """
+        self._query_results.clear()
+        if not hard:
+            ids = self.collection.get(include=[])['ids']
+            if ids:
+                self.collection.delete(ids=ids)
+            return
+        
         try:
             self.client.delete_collection(name=self.collection_name)
-            self.collection = self.client.create_collection(
-                name=self.collection_name,
-                metadata={"hnsw:space": "cosine"}
-            )
-        except:
-            pass
+        except ValueError:
+            pass  # Already gone
+        self.collection = self.client.create_collection(
+            name=self.collection_name,
+            metadata={"hnsw:space": "cosine"}
+        )